@@ -50,6 +50,7 @@ from linotp.lib.resolver import getResolverObject
 from linotp.lib.selftest import isSelfTest
 
 from linotp.lib.resolver import getResolverClassName
+from linotp.lib.resolver import get_resolver_class
 from linotp.lib.resolver import getResolverList
 
 from linotp.useridresolver.UserIdResolver import ResolverNotAvailable
@@ -1334,10 +1335,28 @@ def _get_user_lookup_cache(resolver_spec):
     return user_lookup_cache
 
 
+def _delete_resolver_lookup_cache(resolver_spec):
+    """
+    helper - dump the lookup cache, which might be kept by the resolver
+    class itself, like the ldap resolver does
+
+    :param resolver_spec: resolver description
+    """
+
+    cls_identifier, config_identifier = parse_resolver_spec(resolver_spec)
+
+    resolver_cls = get_resolver_class(cls_identifier)
+
+    if hasattr(resolver_cls, 'delete_lookup_cache'):
+        resolver_cls.delete_lookup_cache(config_identifier)
+
+
 def delete_resolver_user_cache(resolver_spec):
     """
     in case of a resolver change / delete, we have to dump the user cache
     """
+    _delete_resolver_lookup_cache(resolver_spec)
+
     user_lookup_cache = _get_user_lookup_cache(resolver_spec)
 
     if user_lookup_cache:
@@ -1377,6 +1396,8 @@ def delete_from_resolver_user_cache(login, user_id, resolver_spec):
 def delete_from_user_cache(user_name, user_id, resolver_spec):
     """ helper to remove permutation of user entry """
 
+    _delete_resolver_lookup_cache(resolver_spec)
+
     delete_from_resolver_user_cache(
         user_name, None, resolver_spec)
 
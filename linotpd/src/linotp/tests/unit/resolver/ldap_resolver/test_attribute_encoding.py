@@ -159,4 +159,24 @@ class TestLDAPResolverAttributes(unittest.TestCase):
 
 
         return
+
+    def test_binary_attributes(self):
+        """
+        the values of binary attributes are kept as bytes, while the others
+        are utf-8 decoded
+        """
+
+        resolver = LDAPResolver()
+
+        sid = b'\x01\x05\x00\x00\x00\x00\x00\x05\x15\x00\xff\xfe'
+        userinfo = resolver._get_userinfo_from_result(
+            ('cn=hans,dc=example,dc=com',
+             {'objectSid': [sid],
+              'jpegPhoto': [b'\xff\xd8\xff\xe0'],
+              'cn': ['hans'.encode('utf-8')]}))
+
+        assert userinfo['objectSid'] == [sid]
+        assert userinfo['jpegPhoto'] == [b'\xff\xd8\xff\xe0']
+        assert userinfo['cn'] == ['hans']
+
 # eof #
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+
+#
+#   LinOTP - the open source solution for two factor authentication
+#   Copyright (C) 2010 - 2019 KeyIdentity GmbH
+#
+#   This file is part of LinOTP userid resolvers.
+#
+#   This program is free software: you can redistribute it and/or
+#   modify it under the terms of the GNU Affero General Public
+#   License, version 3, as published by the Free Software Foundation.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the
+#              GNU Affero General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   E-mail: linotp@keyidentity.com
+#   Contact: www.linotp.org
+#   Support: www.keyidentity.com
+
+"""
+LDAP Resolver unit test for the connection pool
+"""
+
+import threading
+import time
+import unittest
+from mock import Mock
+from mock import patch
+from ldap import INVALID_CREDENTIALS
+from ldap import RES_SEARCH_RESULT
+from ldap import SERVER_DOWN
+from ldap import TIMEOUT
+
+from linotp.useridresolver.LDAPIdResolver import ConnectionPool
+from linotp.useridresolver.LDAPIdResolver import _connect_and_bind
+from linotp.useridresolver.LDAPIdResolver import _password_getter
+from linotp.useridresolver.LDAPIdResolver import IdResolver as LDAPResolver
+
+
+class MockedLdapObject:
+    """
+    Mocked LDAP Object - which could be alive, not alive or hanging
+    """
+
+    def __init__(self, alive=True, hanging=False):
+        self.alive = alive
+        self.hanging = hanging
+        self.unbound = False
+        self.abandoned = None
+
+    def search_ext(self, base, scope, filterstr=None, attrlist=None,
+                   sizelimit=0, timeout=-1):
+        if not self.alive:
+            raise SERVER_DOWN('connection lost')
+        return 1
+
+    def result(self, msgid, all=1, timeout=None):
+        if self.hanging:
+            raise TIMEOUT('no response')
+        return RES_SEARCH_RESULT, []
+
+    def simple_bind_s(self, user, passw):
+        if passw != 'geheim1':
+            raise INVALID_CREDENTIALS('not geheim1!')
+        return True
+
+    def unbind_s(self):
+        self.unbound = True
+
+    def abandon_ext(self, msgid):
+        self.abandoned = msgid
+
+
+class MockedSecurityProvider:
+    """
+    Mocked security provider - the sessions are bound to the thread
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self.used_by = []
+
+    def getSecurityModule(self):
+        thread_id = threading.get_ident()
+        hsm_obj = Mock()
+        hsm_obj.isReady.return_value = True
+        hsm_obj.decryptPassword.side_effect = (
+            lambda crypted: self.used_by.append(thread_id) or b'geheim1')
+        return self.sessions.setdefault(thread_id, {'obj': hsm_obj})
+
+    def dropSecurityModule(self):
+        del self.sessions[threading.get_ident()]
+
+
+class TestConnectionPool(unittest.TestCase):
+    """
+    tests the reuse of the pooled ldap connections
+    """
+
+    def test_reuse(self):
+        """ a released connection is returned on the next acquire """
+
+        pool = ConnectionPool()
+        l_obj = MockedLdapObject()
+
+        assert pool.acquire('key') is None
+
+        pool.release('key', l_obj, maxsize=2)
+        assert pool.acquire('key') is l_obj
+        assert pool.acquire('key') is None
+
+        # connections are only shared for the same key
+        pool.release('key', l_obj, maxsize=2)
+        assert pool.acquire('other key') is None
+
+    def test_stale_connection(self):
+        """ connections which are not alive anymore are discarded """
+
+        pool = ConnectionPool()
+        stale = MockedLdapObject(alive=False)
+
+        pool.release('key', stale, maxsize=2)
+        assert pool.acquire('key') is None
+        assert stale.unbound
+
+    def test_hanging_connection(self):
+        """ connections which do not respond to the probe are discarded """
+
+        pool = ConnectionPool()
+        hanging = MockedLdapObject(hanging=True)
+
+        pool.release('key', hanging, maxsize=2)
+        assert pool.acquire('key') is None
+        assert hanging.unbound
+
+    def test_pool_full(self):
+        """ connections beyond the pool size are unbound """
+
+        pool = ConnectionPool()
+        first = MockedLdapObject()
+        second = MockedLdapObject()
+
+        pool.release('key', first, maxsize=1)
+        pool.release('key', second, maxsize=1)
+
+        assert not first.unbound
+        assert second.unbound
+
+    def test_pool_warmer(self):
+        """ the warmer refills the pool up to the minimum size """
+
+        pool = ConnectionPool()
+
+        pool.warm('key', MockedLdapObject, minsize=2, maxsize=4)
+
+        for _i in range(100):
+            if pool.size('key') == 2:
+                break
+            time.sleep(0.01)
+
+        assert pool.size('key') == 2
+
+        # after taking a connection, the warmer is signaled to refill
+
+        assert pool.acquire('key') is not None
+        pool.warm('key', MockedLdapObject, minsize=2, maxsize=4)
+
+        for _i in range(100):
+            if pool.size('key') == 2:
+                break
+            time.sleep(0.01)
+
+        assert pool.size('key') == 2
+
+    def test_idle_warmer_signaled(self):
+        """ an idle warmer, which has been signaled, does not terminate """
+
+        pool = ConnectionPool()
+
+        with patch('linotp.useridresolver.LDAPIdResolver.'
+                   'POOL_WARMER_IDLE_TIMEOUT', 3600):
+            pool.warm('key', MockedLdapObject, minsize=1, maxsize=2)
+
+            for _i in range(100):
+                if pool.size('key') == 1:
+                    break
+                time.sleep(0.01)
+
+        warmer = pool._warmers['key']
+
+        # the signal, which arrives before the idle warmer terminates, is
+        # not lost - the warmer is kept and serves the signal
+
+        warmer.wakeup.set()
+        assert not pool.remove_warmer('key', warmer)
+        assert pool._warmers['key'] is warmer
+
+        warmer.wakeup.clear()
+        assert pool.remove_warmer('key', warmer)
+        assert 'key' not in pool._warmers
+
+    def test_warmer_after_request(self):
+        """ the warmer decrypts the bind password with its own session """
+
+        provider = MockedSecurityProvider()
+
+        # the request thread sets up the pool warmer
+
+        with patch('linotp.useridresolver.LDAPIdResolver.getGlobalObject',
+                   return_value=Mock(security_provider=provider)):
+            get_bindpw = _password_getter('crypted:geheim1')
+
+        # the pool warmer runs after the request context is torn down
+
+        request_thread = threading.get_ident()
+        pool = ConnectionPool()
+
+        with patch('linotp.useridresolver.LDAPIdResolver.IdResolver.connect',
+                   return_value=MockedLdapObject()):
+            pool.warm('key', lambda: _connect_and_bind(
+                'ldap://pooled.example.com', None, 'cn=admin', get_bindpw),
+                minsize=1, maxsize=2)
+
+            for _i in range(100):
+                if pool.size('key') == 1:
+                    break
+                time.sleep(0.01)
+
+        assert pool.size('key') == 1
+
+        assert provider.used_by
+        assert request_thread not in provider.used_by
+
+        # the session of the warmer is released after the decryption
+        assert not provider.sessions
+
+    def test_close_pending_search(self):
+        """ a connection with an outstanding search is not pooled """
+
+        resolver = LDAPResolver()
+        resolver.pool_size = 2
+        resolver.pool_key = ('test_close_pending_search',)
+
+        l_obj = MockedLdapObject()
+        resolver.l_obj = l_obj
+        resolver.l_obj_uri = 'ldap://pooled.example.com'
+        resolver._pending_msgid = 42
+
+        resolver.close()
+
+        assert l_obj.abandoned == 42
+        assert l_obj.unbound
+        assert resolver.connection_pool.acquire(
+            (resolver.pool_key, resolver.l_obj_uri)) is None
+
+    def test_getUserId_timeout(self):
+        """ a connection with a timed out user lookup is not pooled """
+
+        resolver = LDAPResolver()
+        resolver.filter = '(uid=%s)'
+        resolver.uidType = 'dn'
+        resolver.userinfo = {'username': 'uid'}
+        resolver.loginnameattribute = 'uid'
+        resolver.pool_size = 2
+        resolver.pool_key = ('test_getUserId_timeout',)
+
+        l_obj = MockedLdapObject(hanging=True)
+        resolver.l_obj = l_obj
+        resolver.l_obj_uri = 'ldap://pooled.example.com'
+
+        with patch.object(LDAPResolver, 'bind', return_value=l_obj):
+            assert resolver.getUserId('hans') == ''
+
+        resolver.close()
+
+        assert l_obj.abandoned == 1
+        assert l_obj.unbound
+
+    @patch('linotp.useridresolver.LDAPIdResolver.IdResolver.connect')
+    def test_checkPass_pooled(self, mock_connect):
+        """ the connection of a password check is reused by the next one """
+
+        mock_connect.side_effect = lambda uri, caller: MockedLdapObject()
+
+        resolver = LDAPResolver()
+        resolver.ldapuri = 'ldap://pooled.example.com'
+        resolver.uidType = 'dn'
+        resolver.pool_size = 2
+        resolver.pool_key = ('test_checkPass_pooled',)
+
+        assert resolver.checkPass('cn=hans', 'geheim1')
+        assert not resolver.checkPass('cn=hans', 'geheim2')
+        assert resolver.checkPass('cn=hans', 'geheim1')
+
+        assert mock_connect.call_count == 1
+
+# eof #
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+#
+#   LinOTP - the open source solution for two factor authentication
+#   Copyright (C) 2010 - 2019 KeyIdentity GmbH
+#
+#   This file is part of LinOTP userid resolvers.
+#
+#   This program is free software: you can redistribute it and/or
+#   modify it under the terms of the GNU Affero General Public
+#   License, version 3, as published by the Free Software Foundation.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the
+#              GNU Affero General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   E-mail: linotp@keyidentity.com
+#   Contact: www.linotp.org
+#   Support: www.keyidentity.com
+
+"""
+LDAP Resolver unit test for the user lookup cache
+"""
+
+import unittest
+from mock import patch
+
+from linotp.useridresolver.LDAPIdResolver import IdResolver as LDAPResolver
+from linotp.useridresolver.LDAPIdResolver import LookupCache
+
+
+class TestLookupCache(unittest.TestCase):
+    """
+    tests the expiration and eviction of the lookup cache entries
+    """
+
+    def test_expiration(self):
+        """ entries are only returned within their time to live """
+
+        now = [1000.0]
+
+        cache = LookupCache(clock=lambda: now[0])
+        cache.set(('resolver', 'userid', 'hans'), 'uid=hans', ttl=300)
+
+        now[0] = 1299.0
+        assert cache.get(('resolver', 'userid', 'hans')) == 'uid=hans'
+
+        now[0] = 1301.0
+        assert cache.get(('resolver', 'userid', 'hans')) is None
+
+    def test_eviction(self):
+        """ a full cache drops the oldest entries """
+
+        cache = LookupCache(maxsize=2)
+        cache.set('first', 1, ttl=300)
+        cache.set('second', 2, ttl=300)
+        cache.set('third', 3, ttl=300)
+
+        assert cache.get('first') is None
+        assert cache.get('second') == 2
+        assert cache.get('third') == 3
+
+    def test_remove_resolver_entries(self):
+        """ the entries of a resolver definition could be removed """
+
+        cache = LookupCache()
+        cache.set((('LDAPIdResolver.IdResolver.one', 'ldap://one'),
+                   'userid', 'hans'), 'uid=hans', ttl=300)
+        cache.set((('LDAPIdResolver.IdResolver.two', 'ldap://two'),
+                   'userid', 'hans'), 'uid=hans', ttl=300)
+
+        cache.remove_resolver_entries('LDAPIdResolver.IdResolver.one')
+
+        assert cache.get((('LDAPIdResolver.IdResolver.one', 'ldap://one'),
+                          'userid', 'hans')) is None
+        assert cache.get((('LDAPIdResolver.IdResolver.two', 'ldap://two'),
+                          'userid', 'hans')) == 'uid=hans'
+
+    @patch('linotp.useridresolver.LDAPIdResolver.IdResolver.unbind')
+    @patch('linotp.useridresolver.LDAPIdResolver.IdResolver.bind')
+    def test_getUserId_cached(self, mock_bind, mock_unbind):
+        """ the second lookup of a user is served from the cache """
+
+        class Bindresult(object):
+
+            searches = 0
+
+            def search_ext(self, base, scope_subtree, filterstr=None,
+                           sizelimit=None, attrlist=None, timeout=None):
+                Bindresult.searches += 1
+                return True
+
+            def result(self, l_id, all=1):
+                return [[], [('uid=hans,ou=people,dc=example,dc=com', {})]]
+
+        mock_bind.return_value = Bindresult()
+        mock_unbind.return_value = None
+
+        resolver = LDAPResolver()
+        resolver.filter = '(&(uid=%s)(objectClass=inetOrgPerson))'
+        resolver.cache_timeout = 300
+        resolver.cache_key = ('test_getUserId_cached',)
+
+        try:
+            userid = resolver.getUserId('hans')
+            assert userid == 'uid=hans,ou=people,dc=example,dc=com'
+
+            assert resolver.getUserId('hans') == userid
+            assert Bindresult.searches == 1
+
+        finally:
+            LDAPResolver.lookup_cache.clear()
+
+    @patch('linotp.useridresolver.LDAPIdResolver.IdResolver.unbind')
+    @patch('linotp.useridresolver.LDAPIdResolver.IdResolver.bind')
+    def test_getUserId_unknown_user_cached(self, mock_bind, mock_unbind):
+        """ the lookup of an unknown user is cached as well """
+
+        class Bindresult(object):
+
+            searches = 0
+
+            def search_ext(self, base, scope_subtree, filterstr=None,
+                           sizelimit=None, attrlist=None, timeout=None):
+                Bindresult.searches += 1
+                return True
+
+            def result(self, l_id, all=1):
+                return [[], []]
+
+        mock_bind.return_value = Bindresult()
+        mock_unbind.return_value = None
+
+        resolver = LDAPResolver()
+        resolver.filter = '(&(uid=%s)(objectClass=inetOrgPerson))'
+        resolver.negative_cache_timeout = 60
+        resolver.cache_key = ('LDAPIdResolver.IdResolver.unknown_user',)
+
+        try:
+            assert resolver.getUserId('nobody') == ''
+            assert resolver.getUserId('nobody') == ''
+            assert Bindresult.searches == 1
+
+            # the unknown user is looked up again after the invalidation
+
+            LDAPResolver.delete_lookup_cache('unknown_user')
+
+            assert resolver.getUserId('nobody') == ''
+            assert Bindresult.searches == 2
+
+        finally:
+            LDAPResolver.lookup_cache.clear()
+
+# eof #
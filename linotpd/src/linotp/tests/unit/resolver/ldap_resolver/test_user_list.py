@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+
+#
+#   LinOTP - the open source solution for two factor authentication
+#   Copyright (C) 2010 - 2019 KeyIdentity GmbH
+#
+#   This file is part of LinOTP userid resolvers.
+#
+#   This program is free software: you can redistribute it and/or
+#   modify it under the terms of the GNU Affero General Public
+#   License, version 3, as published by the Free Software Foundation.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU Affero General Public License for more details.
+#
+#   You should have received a copy of the
+#              GNU Affero General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+#
+#   E-mail: linotp@keyidentity.com
+#   Contact: www.linotp.org
+#   Support: www.keyidentity.com
+
+"""
+LDAP Resolver unit test for the paged read of the user list
+"""
+
+import unittest
+from mock import Mock
+from mock import patch
+
+import ldap
+from ldap.controls import SimplePagedResultsControl
+
+from linotp.useridresolver.LDAPIdResolver import IdResolver as LDAPResolver
+
+
+class PagedResultControl(object):
+    """ the paged results response control of the server """
+
+    controlType = SimplePagedResultsControl.controlType
+
+    def __init__(self, cookie):
+        self.cookie = cookie
+
+
+class MockedLdapObject(object):
+    """
+    Mocked LDAP Object with two users, which pages the result if the
+    server supports the paging
+    """
+
+    users = [
+        ('uid=hans,ou=people,dc=example,dc=com', {'uid': [b'hans']}),
+        ('uid=anne,ou=people,dc=example,dc=com', {'uid': [b'anne']}),
+        ]
+
+    def __init__(self, paging=True, server_sizelimit=0):
+        self.paging = paging
+        self.server_sizelimit = server_sizelimit
+        self.searches = []
+        self._entries = []
+
+    def search_ext(self, base, scope, filterstr=None, attrlist=None,
+                   serverctrls=None, sizelimit=0, timeout=None):
+        page_ctrl = serverctrls[0] if serverctrls else None
+        self.searches.append(
+            (page_ctrl.size, page_ctrl.cookie) if page_ctrl else sizelimit)
+        self._entries = list(self.users)
+        return len(self.searches)
+
+    def result3(self, msgid, all=1, timeout=None):
+        if not self.paging:
+            if 0 < self.server_sizelimit < len(self.users):
+                raise ldap.SIZELIMIT_EXCEEDED('sizelimit exceeded')
+            return ldap.RES_SEARCH_RESULT, self.users, msgid, []
+
+        size, cookie = self.searches[-1]
+        start = int(cookie or 0)
+        entries = self.users[start:start + size]
+
+        next_cookie = b''
+        if size and start + size < len(self.users):
+            next_cookie = str(start + size).encode()
+
+        return (ldap.RES_SEARCH_RESULT, entries, msgid,
+                [PagedResultControl(next_cookie)])
+
+    def result(self, msgid, all=0, timeout=None):
+        if not self._entries:
+            return ldap.RES_SEARCH_RESULT, []
+        if (0 < self.server_sizelimit and
+                len(self.users) - len(self._entries) >= self.server_sizelimit):
+            raise ldap.SIZELIMIT_EXCEEDED('sizelimit exceeded')
+        return ldap.RES_SEARCH_ENTRY, [self._entries.pop(0)]
+
+    def simple_bind_s(self, binddn, bindpw):
+        return True
+
+    def unbind_s(self):
+        return True
+
+
+class TestUserList(unittest.TestCase):
+    """
+    tests the read of the user list with and without paging support
+    """
+
+    def get_user_list(self, l_obj, sizelimit):
+
+        resolver = LDAPResolver()
+        resolver.searchfilter = '(uid=*)'
+        resolver.loginnameattribute = 'uid'
+        resolver.userinfo = {'username': 'uid'}
+        resolver.uidType = 'dn'
+        resolver.sizelimit = sizelimit
+
+        with patch.object(LDAPResolver, 'bind', return_value=l_obj), \
+                patch.object(LDAPResolver, 'unbind', return_value=None):
+            return resolver.getUserList({})
+
+    def test_paged_sizelimit(self):
+        """ the paged result set is released when the sizelimit is reached """
+
+        l_obj = MockedLdapObject()
+        users = self.get_user_list(l_obj, sizelimit=1)
+
+        assert [user['username'] for user in users] == ['hans']
+        assert l_obj.searches == [(1, ''), (0, b'1')]
+
+    def test_paged_all_users(self):
+        """ all pages are read, if there is no sizelimit """
+
+        l_obj = MockedLdapObject()
+        users = self.get_user_list(l_obj, sizelimit=0)
+
+        assert [user['username'] for user in users] == ['hans', 'anne']
+
+    def test_no_paging_support(self):
+        """ without paging support the users are read with one search """
+
+        l_obj = MockedLdapObject(paging=False)
+        users = self.get_user_list(l_obj, sizelimit=5)
+
+        assert [user['username'] for user in users] == ['hans', 'anne']
+        assert l_obj.searches == [(5, '')]
+
+    def test_no_paging_server_sizelimit(self):
+        """ the users of a dropped result set are read by a plain search """
+
+        l_obj = MockedLdapObject(paging=False, server_sizelimit=1)
+        users = self.get_user_list(l_obj, sizelimit=5)
+
+        assert [user['username'] for user in users] == ['hans']
+        assert l_obj.searches == [(5, ''), 5]
+
+    def test_testconnection_sizelimit(self):
+        """ the testconnection reads the users page wise up to the limit """
+
+        l_config, _missing = LDAPResolver.filter_config({
+            'LDAPURI': 'ldap://ldap.example.com',
+            'LDAPBASE': 'dc=example,dc=com',
+            'BINDDN': 'cn=admin,dc=example,dc=com',
+            'LDAPSEARCHFILTER': '(uid=*)',
+            'LDAPFILTER': '(uid=%s)',
+            'LOGINNAMEATTRIBUTE': 'uid',
+            'USERINFO': '{"username": "uid"}',
+            'UIDTYPE': 'dn',
+            'SIZELIMIT': '1',
+            'linotp.certificates.use_system_certificates': False,
+            })
+        l_config['BINDPW'] = Mock(get_unencrypted=lambda: 'geheim1')
+
+        l_obj = MockedLdapObject()
+
+        with patch.object(LDAPResolver, 'filter_config',
+                          return_value=(l_config, [])), \
+                patch.object(LDAPResolver, 'connect', return_value=l_obj):
+            status, users = LDAPResolver.testconnection({})
+
+        assert status == 'success'
+        assert users == [{'userid': 'uid=hans,ou=people,dc=example,dc=com'}]
+        assert l_obj.searches == [(1, ''), (0, b'1')]
+
+# eof #
@@ -36,6 +36,9 @@ import json
 try:
 
     from linotp.useridresolver.LDAPIdResolver import IdResolver as ldap_resolver
+    from linotp.useridresolver.LDAPIdResolver import escape_filter_chars
+    from linotp.useridresolver.LDAPIdResolver import _escape_search_value
+    from linotp.useridresolver.LDAPIdResolver import _escape_filter_value
     from linotp.useridresolver.SQLIdResolver import IdResolver as sql_resolver
     NO_LDAP_AVAILABLE = ''
 
@@ -80,6 +83,63 @@ class TestResolverTestCase(unittest.TestCase):
 
         return
 
+    def test_ldap_escape_filter_chars(self):
+        """
+        unit test for the ldap filter escaping of binary data like the guid
+        """
+
+        if NO_LDAP_AVAILABLE:
+            self.skipTest("skipping test: %s" % NO_LDAP_AVAILABLE)
+
+        guid = b'\x01\x2a(Az)\\\xff'
+        assert escape_filter_chars(guid) == '\\01\\2a\\28Az\\29\\5c\\ff'
+
+        # strings are escaped in their utf-8 representation
+        assert escape_filter_chars('m\u00f6z*') == 'm\\c3\\b6z\\2a'
+
+        return
+
+    def test_ldap_escape_search_value(self):
+        """
+        unit test for the escaping of the user list search values
+        """
+
+        if NO_LDAP_AVAILABLE:
+            self.skipTest("skipping test: %s" % NO_LDAP_AVAILABLE)
+
+        # the wildcard is preserved, while the filter syntax is escaped
+        assert _escape_search_value('h*') == 'h*'
+        assert _escape_search_value('*)(uid=*') == '*\\29\\28uid=*'
+
+        return
+
+    def test_ldap_escape_filter_value(self):
+        """
+        unit test for the escaping of the login name of the user lookup
+        """
+
+        if NO_LDAP_AVAILABLE:
+            self.skipTest("skipping test: %s" % NO_LDAP_AVAILABLE)
+
+        assert _escape_filter_value('hans') == 'hans'
+        assert (_escape_filter_value('*)(uid=\\\x00') ==
+                '\\2a\\29\\28uid=\\5c\\00')
+
+        return
+
+    def test_ldap_guid2str(self):
+        """
+        unit test for the string representation of the binary guid
+        """
+
+        if NO_LDAP_AVAILABLE:
+            self.skipTest("skipping test: %s" % NO_LDAP_AVAILABLE)
+
+        guid = b'\x01\x2a\xff\x00'
+        assert ldap_resolver.guid2str(guid) == '012aff00'
+
+        return
+
     def test_detect_sql_primary_change(self):
         """
         unit test for sql primary key change
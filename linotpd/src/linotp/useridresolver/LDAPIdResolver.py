@@ -33,25 +33,32 @@
 
 
 import binascii
+import bisect
+import functools
+import hashlib
 import logging
 import os
+import queue
 import tempfile
+import threading
+import time
 import traceback
-from typing import Any, Callable, Dict, Tuple, Union
+from typing import Any, Callable, Dict, List, Set, Tuple, Union
 
 import json
 import sys
 
-from datetime import datetime
-from hashlib import sha1
-
 import ldap.filter
 from ldap.controls import SimplePagedResultsControl
+from ldap.controls.sss import SSSRequestControl
 
 from linotp.lib.type_utils import encrypted_data
 from linotp.lib.type_utils import text
 from linotp.lib.type_utils import boolean
 
+from linotp.lib.config.global_api import getGlobalObject
+from linotp.lib.error import HSMException
+
 from linotp.lib.resources import ResourceScheduler
 from linotp.lib.resources import string_to_list
 
@@ -68,9 +75,38 @@ log = logging.getLogger(__name__)
 DEFAULT_UID_TYPE = "DN"  # can be entryUUID, GUID, objectGUID or DN
 ENCODING = 'utf-8'
 DEFAULT_SIZELIMIT = 500
+DEFAULT_PAGE_SIZE = 500
 DEFAULT_EnforceTLS = False
 BIND_NOT_POSSIBLE_TIMEOUT = 30
 TIMEOUT_NO_LIMIT = -1
+CERTFILE_CHECK_INTERVAL = 1
+DEFAULT_CACHE_TIMEOUT = 0
+DEFAULT_NEGATIVE_CACHE_TIMEOUT = 0
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_POOL_SIZE = 10
+DEFAULT_POOL_MIN_SIZE = 0
+POOL_WARMER_IDLE_TIMEOUT = 300
+POOL_PROBE_TIMEOUT = 1
+
+# supported search scopes for the lookup of users by their uid
+UID_SEARCH_SCOPES = {
+    'sub': ldap.SCOPE_SUBTREE,
+    'one': ldap.SCOPE_ONELEVEL,
+    }
+DEFAULT_UID_SEARCH_SCOPE = 'sub'
+
+# offset of the AD account expiry time: 116444736000000000 = 31/12/1601
+# plus the day, as the count starts at 31/12/1601 and not at 01/01/1601
+AD_ACCOUNT_EXPIRY_OFFSET = 116444736000000000 + 86400
+
+
+# lookup table with the filter representation of every byte: all bytes
+# outside of '0'..'z' and the filter special chars are quoted
+
+_ESCAPE_TABLE = [
+    chr(byte) if ord('0') <= byte <= ord('z') and chr(byte) not in "\\*()"
+    else "\\%02x" % byte
+    for byte in range(256)]
 
 
 def escape_filter_chars(filterstr):
@@ -79,36 +115,534 @@ def escape_filter_chars(filterstr):
     - used especially for search with guid - which consists of binary data
     from http://sourceforge.net/p/python-ldap/feature-requests/7/
 
-    :param filterstr: the unescaped filte string
+    :param filterstr: the unescaped filter string or binary data
     :return: escaped filter string
     """
-    ret = []
-    for c in filterstr:
-        if c < '0' or c > 'z' or c in "\\*()":
-            c = "\\%02x" % ord(c)
-        ret.append(c)
-    return ''.join(ret)
+    if isinstance(filterstr, str):
+        filterstr = filterstr.encode('utf-8')
+
+    return ''.join([_ESCAPE_TABLE[byte] for byte in filterstr])
+
+
+# the search values of the user list may contain the '*' wildcard, so all
+# other special characters of the ldap filter syntax are escaped
+_SEARCH_VALUE_ESCAPES = str.maketrans({
+    '\\': '\\5c', '(': '\\28', ')': '\\29', '\x00': '\\00'})
+
+# the login name of the user lookup is escaped completely
+_FILTER_VALUE_ESCAPES = str.maketrans({
+    '\\': '\\5c', '*': '\\2a', '(': '\\28', ')': '\\29',
+    '\x00': '\\00'})
+
+
+def _escape_search_value(value):
+    """
+    helper - escape a search value of the user list, where the wildcard
+    character '*' is preserved
+
+    :param value: the search value
+    :return: the escaped search value
+    """
+    return ("%s" % value).translate(_SEARCH_VALUE_ESCAPES)
+
+
+def _escape_filter_value(value):
+    """
+    helper - escape a value for the ldap filter as
+    ldap.filter.escape_filter_chars does, but in a single pass
+
+    :param value: the filter value
+    :return: the escaped filter value
+    """
+    return value.translate(_FILTER_VALUE_ESCAPES)
+
+
+# cache of the cert file existance checks: filename -> (exists, checked_at)
+_cert_file_checks: Dict[str, Tuple[bool, float]] = {}
+
+
+def _is_cert_file(cert_file):
+    """
+    helper - check if the cert file exists
+
+    as this is checked for every connect, the result is cached and the
+    file is only checked again after the CERTFILE_CHECK_INTERVAL
+
+    :param cert_file: the filename of the certfile or None
+    :return: boolean
+    """
+
+    if not cert_file:
+        return False
+
+    now = time.monotonic()
+
+    exists, checked_at = _cert_file_checks.get(cert_file, (False, None))
+
+    if checked_at is None or now - checked_at > CERTFILE_CHECK_INTERVAL:
+        exists = os.path.isfile(cert_file)
+        _cert_file_checks[cert_file] = (exists, now)
+
+    return exists
 
 
 def _add_cacertificates_to_file(ca_file, cacertificates):
     """
     dump all certificates to a file
 
+    the certificates are written in sorted order, so that the file content
+    only depends on the set of certificates. If the file already contains
+    these certificates, it is not written again, otherwise it is replaced
+    atomically, so that a concurrent connect never reads a partial file.
+
     :param ca_file: the filename of the certfile
     :param cacertificates: set of the certificates
     :return: the filename of the certificates
     """
-    with open(ca_file, "w") as fil:
-        for cacert in cacertificates:
-            cert = cacert.strip()
-            if ("-----BEGIN CERTIFICATE-----" in cert and
-               "-----END CERTIFICATE-----" in cert):
-                fil.write(cert)
-                fil.write("\n")
+    content = []
+    for cacert in sorted(cacertificates):
+        cert = cacert.strip()
+        if ("-----BEGIN CERTIFICATE-----" in cert and
+           "-----END CERTIFICATE-----" in cert):
+            content.append(cert)
+            content.append("\n")
+
+    content = "".join(content)
+
+    try:
+        with open(ca_file, "r") as fil:
+            if fil.read() == content:
+                return ca_file
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    handle, tmp_file = tempfile.mkstemp(
+        dir=os.path.dirname(ca_file) or None, suffix=".tmp")
+    try:
+        # mkstemp creates the file with mode 0600, but the certificates
+        # are public and have to be readable like the replaced file
+        with os.fdopen(handle, "w") as fil:
+            os.fchmod(fil.fileno(), 0o644)
+            fil.write(content)
+        os.replace(tmp_file, ca_file)
+    except OSError:
+        os.unlink(tmp_file)
+        raise
+
+    # the cert file exists now
+    _cert_file_checks.pop(ca_file, None)
 
     return ca_file
 
 
+class LookupCache(object):
+    """
+    process wide cache for the results of the ldap user lookups
+
+    the entries are stored along with their expiration time and are dropped
+    on access, when they are expired. If the cache is full, the expired and
+    then the oldest entries are removed.
+
+    the cache keys start with the cache key of the resolver definition,
+    which starts with the resolver id.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, clock=time.monotonic):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: Dict[Tuple, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        lookup a not expired cache entry
+
+        :param key: the cache key
+        :return: the cached value or None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires = entry
+        if expires < self._clock():
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+
+        return value
+
+    def set(self, key, value, ttl):
+        """
+        add a value to the cache
+
+        :param key: the cache key
+        :param value: the value, which must not be None
+        :param ttl: time to live of the entry in seconds
+        """
+        now = self._clock()
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                self._evict(now)
+            self._entries[key] = (value, now + ttl)
+
+    def _evict(self, now):
+        """
+        remove the expired entries and if this is not enough, as well the
+        oldest entries - the lock must be held by the caller
+        """
+        for key in [key for key, (_value, expires) in self._entries.items()
+                    if expires < now]:
+            del self._entries[key]
+
+        while len(self._entries) >= self.maxsize:
+            del self._entries[next(iter(self._entries))]
+
+    def remove_resolver_entries(self, resolver_id):
+        """
+        remove all entries of a resolver definition
+
+        :param resolver_id: the resolver id of the resolver definition
+        """
+        with self._lock:
+            for key in [key for key in self._entries
+                        if key[0] and key[0][0] == resolver_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _digest(value):
+    """
+    helper - the sha256 digest of a config value, which should not be kept
+    in clear text in the pool keys
+
+    :param value: the config value
+    :return: the hex digest
+    """
+    return hashlib.sha256(str(value).encode('utf-8')).hexdigest()
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_uri_list(ldapuri):
+    """
+    helper - split the comma separated ldap uris of a resolver definition
+
+    the resolver definitions rarely change, so the parsed lists are kept
+
+    :param ldapuri: the comma separated ldap uris
+    :return: tuple of the stripped, non empty uris
+    """
+    return tuple(string_to_list(ldapuri))
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_userinfo(userinfo):
+    """
+    helper - parse the json user info mapping of a resolver definition
+
+    the mapping is returned as tuple of items, so that the cached result
+    can not be modified by the callers
+
+    :param userinfo: the json document with the user info mapping
+    :return: tuple of (user key, ldap attribute) items
+    """
+    return tuple(json.loads(userinfo).items())
+
+
+# server side sort support per server uri, detected from the rootDSE
+_server_side_sort_support: Dict[str, bool] = {}
+
+
+def _server_side_sort_controls(l_obj, uri, sort_attribute):
+    """
+    helper - get the server side sort control for a search
+
+    the support of the sort control is detected once per server uri
+    by the supportedControl attribute of the rootDSE
+
+    :param l_obj: the bound ldap connection object
+    :param uri: the server uri of the connection
+    :param sort_attribute: the attribute, the result should be sorted by
+    :return: list with the sort control or empty list if not supported
+    """
+
+    supported = _server_side_sort_support.get(uri)
+
+    if supported is None:
+
+        try:
+            root_dse = l_obj.search_s('', ldap.SCOPE_BASE, '(objectClass=*)',
+                                      ['supportedControl'])
+        except ldap.LDAPError as exx:
+            log.warning("failed to read the rootDSE of %r: %r", uri, exx)
+            return []
+
+        supported = False
+        for _dn, entry in root_dse:
+            controls = entry.get('supportedControl', [])
+            if SSSRequestControl.controlType.encode('utf-8') in controls:
+                supported = True
+
+        if not supported:
+            log.info("server %r does not support server side sort", uri)
+
+        _server_side_sort_support[uri] = supported
+
+    if not supported:
+        return []
+
+    return [SSSRequestControl(criticality=False,
+                              ordering_rules=[sort_attribute])]
+
+
+def _unbind_quietly(l_obj):
+    """
+    helper - unbind a connection, which is not used anymore
+
+    :param l_obj: the ldap connection object
+    """
+    try:
+        l_obj.unbind_s()
+    except ldap.LDAPError as exx:
+        log.info("failed to unbind connection: %r", exx)
+
+
+class _ConnectOptions(object):
+    """
+    the connection options of a resolver, as required by the connect -
+    used by the pool warmer, which must not keep the resolver instance
+    """
+
+    def __init__(self, caller):
+        self.CERTFILE = caller.CERTFILE
+        self.enforce_tls = caller.enforce_tls
+        self.only_trusted_certs = caller.only_trusted_certs
+        self.use_sys_cert = caller.use_sys_cert
+        self.noreferrals = caller.noreferrals
+        self.network_timeout = caller.network_timeout
+        self.response_timeout = caller.response_timeout
+
+
+def _password_getter(bindpw):
+    """
+    helper - get a function, which decrypts the bind password on demand
+
+    the function is called by the pool warmer, which must not use the
+    security module session of the request thread, as the sessions are
+    bound to the thread. Thus the function gets a session of its own for
+    the decryption and releases it afterwards.
+
+    :param bindpw: the encrypted bind password
+    :return: function, which returns the unencrypted bind password
+    """
+    security_provider = getGlobalObject().security_provider
+    crypted_pw = str(bindpw)
+
+    def get_bindpw():
+        hsm = security_provider.getSecurityModule()
+        try:
+            hsm_obj = hsm.get('obj')
+            if not hsm_obj or hsm_obj.isReady() is False:
+                raise HSMException('hsm not ready!')
+
+            return hsm_obj.decryptPassword(crypted_pw).decode('utf-8')
+
+        finally:
+            security_provider.dropSecurityModule()
+
+    return get_bindpw
+
+
+def _connect_and_bind(uri, options, binddn, get_bindpw):
+    """
+    helper - establish a new bound connection for the pool warmer
+
+    :param uri: the ldap server uri
+    :param options: the connection options
+    :param binddn: the bind dn
+    :param get_bindpw: function, which returns the bind password
+    :return: the bound ldap connection object
+    """
+    l_obj = IdResolver.connect(uri, caller=options)
+    l_obj.simple_bind_s(binddn, get_bindpw())
+    return l_obj
+
+
+class ConnectionPool(object):
+    """
+    process wide pool of bound ldap connections
+
+    the connections are pooled per key, which identifies the resolver
+    definition and the server uri, so that a connection is only reused by
+    the resolver definition, which established and bound it.
+    """
+
+    def __init__(self):
+        self._pools: Dict[Tuple, queue.LifoQueue] = {}
+        self._warmers: Dict[Tuple, 'PoolWarmer'] = {}
+        self._lock = threading.Lock()
+
+    def size(self, key):
+        """
+        get the number of the pooled connections
+
+        :param key: the pool key
+        :return: the number of connections in the pool
+        """
+        pool = self._pools.get(key)
+        if pool is None:
+            return 0
+
+        return pool.qsize()
+
+    def acquire(self, key):
+        """
+        get a pooled connection, which is verified to be still alive
+
+        :param key: the pool key
+        :return: the ldap connection object or None
+        """
+        pool = self._pools.get(key)
+        if pool is None:
+            return None
+
+        while True:
+            try:
+                l_obj = pool.get_nowait()
+            except queue.Empty:
+                return None
+
+            # the connection is probed by a read of the root dse with a
+            # short timeout, so that a half open connection does not block
+            # the request, even if there is no response timeout
+
+            try:
+                msgid = l_obj.search_ext('', ldap.SCOPE_BASE,
+                                         filterstr='(objectClass=*)',
+                                         attrlist=['1.1'])
+                l_obj.result(msgid, all=1, timeout=POOL_PROBE_TIMEOUT)
+                return l_obj
+
+            except ldap.LDAPError as exx:
+                # this includes the ldap.TIMEOUT of the probe
+                log.info("discarding stale pooled connection: %r", exx)
+                _unbind_quietly(l_obj)
+
+    def release(self, key, l_obj, maxsize):
+        """
+        return a connection into the pool - if the pool is full, the
+        connection is closed
+
+        :param key: the pool key
+        :param l_obj: the bound ldap connection object
+        :param maxsize: the max number of connections pooled for the key
+        """
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.setdefault(
+                    key, queue.LifoQueue(maxsize=maxsize))
+
+        try:
+            pool.put_nowait(l_obj)
+        except queue.Full:
+            _unbind_quietly(l_obj)
+
+    def warm(self, key, connect, minsize, maxsize):
+        """
+        keep a minimum of bound connections in the pool: the warmer of the
+        pool key is started or, if it is already running, signaled to check
+        the number of pooled connections
+
+        :param key: the pool key
+        :param connect: function to establish a new bound connection
+        :param minsize: the number of connections to keep in the pool
+        :param maxsize: the max number of connections pooled for the key
+        """
+        with self._lock:
+            warmer = self._warmers.get(key)
+            if warmer is None:
+                warmer = PoolWarmer(self, key, connect, minsize, maxsize)
+                self._warmers[key] = warmer
+                warmer.start()
+                return
+
+            # signaled under the lock, so that an idle warmer, which is
+            # about to terminate, either sees the signal or is replaced
+            warmer.wakeup.set()
+
+    def remove_warmer(self, key, warmer, force=False):
+        """
+        forget the warmer of the pool key, which is about to terminate
+
+        an idle warmer is not removed, if it has been signaled meanwhile -
+        the check is done under the same lock as the signaling
+
+        :param key: the pool key
+        :param warmer: the terminating warmer
+        :param force: remove the warmer even if it has been signaled
+        :return: boolean - True if the warmer has been removed
+        """
+        with self._lock:
+            if not force and warmer.wakeup.is_set():
+                return False
+
+            if self._warmers.get(key) is warmer:
+                del self._warmers[key]
+
+            return True
+
+
+class PoolWarmer(threading.Thread):
+    """
+    background thread, which refills the connection pool of a pool key up
+    to the minimum size, so that the connect and bind is not done in the
+    request.
+
+    the warmer terminates if it is not signaled within the idle timeout and
+    is started again on the next use of the pool key.
+    """
+
+    def __init__(self, pool, key, connect, minsize, maxsize):
+        super().__init__(name="ldap pool warmer", daemon=True)
+        self.pool = pool
+        self.key = key
+        self.connect = connect
+        self.minsize = minsize
+        self.maxsize = maxsize
+
+        # the initial fill is done without waiting for a signal
+        self.wakeup = threading.Event()
+        self.wakeup.set()
+
+    def run(self):
+        removed = False
+        try:
+            while True:
+                if not self.wakeup.wait(POOL_WARMER_IDLE_TIMEOUT):
+                    removed = self.pool.remove_warmer(self.key, self)
+                    if removed:
+                        return
+
+                self.wakeup.clear()
+
+                while self.pool.size(self.key) < self.minsize:
+                    try:
+                        l_obj = self.connect()
+                    except Exception as exx:
+                        log.warning("failed to establish pooled connection: "
+                                    "%r", exx)
+                        break
+
+                    self.pool.release(self.key, l_obj, self.maxsize)
+        finally:
+            if not removed:
+                self.pool.remove_warmer(self.key, self, force=True)
+
+
 @resolver_registry.class_entry('useridresolver.LDAPIdResolver.IdResolver')
 @resolver_registry.class_entry('useridresolveree.LDAPIdResolver.IdResolver')
 @resolver_registry.class_entry('useridresolver.ldapresolver')
@@ -168,18 +702,43 @@ class IdResolver(UserIdResolver):
         "TIMEOUT": (False, TIMEOUT_NO_LIMIT, text),
         "SIZELIMIT": (False, DEFAULT_SIZELIMIT, int),
         "linotp.certificates.use_system_certificates": (False, False, boolean),
+        "linotp.user_lookup_cache.enabled": (False, True, boolean),
         "CACERTIFICATE": (False, "", text),
 
+        "CACHETIMEOUT": (False, DEFAULT_CACHE_TIMEOUT, int),
+        "NEGATIVECACHETIMEOUT": (False, DEFAULT_NEGATIVE_CACHE_TIMEOUT, int),
+        "POOLSIZE": (False, DEFAULT_POOL_SIZE, int),
+        "POOLMINSIZE": (False, DEFAULT_POOL_MIN_SIZE, int),
+        "UIDSEARCHSCOPE": (False, DEFAULT_UID_SEARCH_SCOPE, text),
+        "SERVERSIDESORT": (False, False, boolean),
+
         }
 
     resolver_parameters.update(UserIdResolver.resolver_parameters)
 
     CERTFILE = None
-    CERTFILE_last_modified = None
+    CERTFILE_last_modified = 0.0
     SYS_CERTFILE = None
     SYS_CERTDIR = None
 
-    ca_certs_dict: Dict[str, str] = {}
+    # the certificates are kept as set for the membership check and as
+    # sorted list for writing the certificate file
+    ca_certs_set: Set[str] = set()
+    ca_certs_sorted: List[str] = []
+
+    # the certificates of the resolver definitions as they were registered
+    registered_certificates: Set[str] = set()
+
+    # the cursoring api version of the python ldap module
+    api_ver = None
+
+    # process wide cache of the user lookups - the resolver instances only
+    # live for one request
+    lookup_cache = LookupCache()
+
+    # process wide pool of the bound connections, so that the connect and
+    # bind is not required for every request
+    connection_pool = ConnectionPool()
 
     @classmethod
     def primary_key_changed(cls, new_params, previous_params):
@@ -214,16 +773,7 @@ class IdResolver(UserIdResolver):
         log.info("[setup] Finding CA certificate")
 
         # preserve system certfile
-        log.info("Setting up cert %r ", ldap.OPT_X_TLS_CACERTFILE)
-        try:
-            cls.SYS_CERTFILE = ldap.get_option(ldap.OPT_X_TLS_CACERTFILE)
-        except ValueError as exx:
-            log.info('unsupported option: ldap.OPT_X_TLS_CACERTFILE %r', exx)
-        try:
-            cls.SYS_CERTDIR = ldap.get_option(ldap.OPT_X_TLS_CACERTDIR)
-        except ValueError as exx:
-            log.info('unsupported option: ldap.OPT_X_TLS_CACERTDIR %r', exx)
-
+        cls.refresh_sys_cert_options()
 
         ca_resolvers = set()
 
@@ -245,25 +795,108 @@ class IdResolver(UserIdResolver):
                        "-----END CERTIFICATE-----" in cacertificate):
                         cert = cacertificate.strip().replace('\r\n', '\n')
                         if cert:
-                            key = sha1(cert.encode('utf-8')).hexdigest()
-                            cls.ca_certs_dict[key] = cert
+                            cls.add_ca_certificate(cert)
                             ca_resolvers.add(entry.split('.')[3])
 
         # if there is any cert in the class dict, we build a certificate file
 
-        if cls.ca_certs_dict:
-            ca_certs = list(cls.ca_certs_dict.values())
-            _add_cacertificates_to_file(cls.CERTFILE, ca_certs)
+        if cls.ca_certs_sorted:
+            _add_cacertificates_to_file(cls.CERTFILE, cls.ca_certs_sorted)
             try:
                 mtime = os.path.getmtime(cls.CERTFILE)
             except OSError:
                 mtime = 0
-            cls.CERTFILE_last_modified = datetime.fromtimestamp(mtime)
+            cls.CERTFILE_last_modified = mtime
             log.info("Using CA certificate from the following resolvers: %r",
                      ca_resolvers)
 
         return
 
+    @classmethod
+    def refresh_sys_cert_options(cls):
+        '''
+        read the system certificate file and directory of the ldap library
+
+        the options are read once on setup and are used for the logging and
+        for restoring the settings, so that they are not queried from the
+        ldap library on every connect
+        '''
+
+        log.info("Setting up cert %r ", ldap.OPT_X_TLS_CACERTFILE)
+        try:
+            cls.SYS_CERTFILE = ldap.get_option(ldap.OPT_X_TLS_CACERTFILE)
+        except ValueError as exx:
+            log.info('unsupported option: ldap.OPT_X_TLS_CACERTFILE %r', exx)
+        try:
+            cls.SYS_CERTDIR = ldap.get_option(ldap.OPT_X_TLS_CACERTDIR)
+        except ValueError as exx:
+            log.info('unsupported option: ldap.OPT_X_TLS_CACERTDIR %r', exx)
+
+    @classmethod
+    def _apply_cert_options(cls, l_obj, uri, caller):
+        """
+        helper - setup the tls options of the connection in one place
+
+        the certificate verification and the local certificate file have
+        to be set before the new SSL context is created, which is the last
+        tls option and is done only once
+
+        :param l_obj: the initialized ldap connection object
+        :param uri: the ldap url
+        :param caller: the resolver or the testconnection caller
+        """
+
+        require_cert = None
+
+        if uri.startswith('ldap://'):
+
+            # for the start_tls of an ldap:// connection the server
+            # certificate is only verified, if tls is enforced
+
+            if caller.enforce_tls:
+                require_cert = ldap.OPT_X_TLS_DEMAND
+            else:
+                require_cert = ldap.OPT_X_TLS_NEVER
+
+        elif caller.only_trusted_certs:
+
+            # If we establish an ldaps connection, we currently accept
+            # untrusted server certificates - default has to be switched.
+            # With the option 'only_trusted_certs' the server certificate
+            # will be verified and only verified servers will be connected
+
+            require_cert = ldap.OPT_X_TLS_DEMAND
+
+        if require_cert is not None:
+            l_obj.set_option(ldap.OPT_X_TLS_REQUIRE_CERT, require_cert)
+
+        #
+        # handle local certificates
+        #
+
+        cert_file = None
+
+        if caller.use_sys_cert:
+
+            log.info("using system certificate file:  %r or system "
+                     "certificate dir %r", cls.SYS_CERTFILE, cls.SYS_CERTDIR)
+
+        elif _is_cert_file(caller.CERTFILE):
+
+            log.debug("using local cert file %r", caller.CERTFILE)
+            cert_file = caller.CERTFILE
+            l_obj.set_option(ldap.OPT_X_TLS_CACERTFILE, cert_file)
+
+        if require_cert is not None or cert_file:
+
+            #
+            # Force lib ldap to create a new SSL context (must be last
+            # TLS option!) from:
+            # https://github.com/rbarrois/python-ldap/blob/master/Demo/initialize.py
+            #
+
+            l_obj.set_option(ldap.OPT_X_TLS_NEWCTX, 0)
+
     @classmethod
     def connect(cls, uri, caller, trace_level=0):
         """
@@ -298,42 +931,7 @@ class IdResolver(UserIdResolver):
         # Set LDAP protocol version used
         l_obj.protocol_version = ldap.VERSION3
 
-        if uri.startswith('ldaps://') or caller.enforce_tls:
-
-            # If we establish an ldaps connection, we currently accept
-            # untrusted server certificates - default has to be switched.
-            # With the option 'only_trusted_certs' the server certificate
-            # will be verified and only verified servers will be connected
-
-            if caller.only_trusted_certs:
-                l_obj.set_option(ldap.OPT_X_TLS_REQUIRE_CERT,
-                                 ldap.OPT_X_TLS_DEMAND)
-
-        #
-        # handle local certificates
-        #
-
-        if caller.use_sys_cert:
-
-            sys_cert_file = ldap.get_option(ldap.OPT_X_TLS_CACERTFILE)
-            sys_cert_dir = ldap.get_option(ldap.OPT_X_TLS_CACERTDIR)
-            log.info("using system certificate file:  %r or system "
-                     "certificate dir %r", sys_cert_file, sys_cert_dir)
-
-        else:
-
-            if caller.CERTFILE and os.path.isfile(caller.CERTFILE):
-
-                log.debug("using local cert file %r", caller.CERTFILE)
-                l_obj.set_option(ldap.OPT_X_TLS_CACERTFILE, caller.CERTFILE)
-
-                #
-                # Force lib ldap to create a new SSL context (must be last
-                # TLS option!) from:
-                # https://github.com/rbarrois/python-ldap/blob/master/Demo/initialize.py
-                #
-
-                l_obj.set_option(ldap.OPT_X_TLS_NEWCTX, 0)
+        cls._apply_cert_options(l_obj, uri, caller)
 
         if uri.startswith('ldap://'):
 
@@ -342,13 +940,6 @@ class IdResolver(UserIdResolver):
             # enforce_tls, we terminate the connection attempt
 
             try:
-                if not caller.enforce_tls:
-                    l_obj.set_option(ldap.OPT_X_TLS_REQUIRE_CERT,
-                                     ldap.OPT_X_TLS_NEVER)
-                else:
-                    l_obj.set_option(ldap.OPT_X_TLS_REQUIRE_CERT,
-                                     ldap.OPT_X_TLS_DEMAND)
-
                 log.debug("for %r connection try to start_tls", uri)
                 l_obj.start_tls_s()
 
@@ -373,14 +964,6 @@ class IdResolver(UserIdResolver):
                 if caller.response_timeout > 0:
                     l_obj.set_option(ldap.OPT_TIMEOUT, caller.response_timeout)
 
-
-        # handle local certificates
-
-        if (not caller.use_sys_cert and caller.CERTFILE and
-           os.path.isfile(caller.CERTFILE)):
-            log.debug("using local cert file %r", caller.CERTFILE)
-            l_obj.set_option(ldap.OPT_X_TLS_CACERTFILE, caller.CERTFILE)
-
         if caller.noreferrals:
             log.debug("using noreferrals: %r", caller.noreferrals)
             l_obj.set_option(ldap.OPT_REFERRALS, 0)
@@ -415,6 +998,7 @@ class IdResolver(UserIdResolver):
             - NOREFERRALS
             - CACERTIFICATE
             - EnforceTLS
+            - SERVERSIDESORT
         """
 
         status = "success"
@@ -455,23 +1039,22 @@ class IdResolver(UserIdResolver):
 
             if caller.use_sys_cert:
 
-                sys_cert_file = ldap.get_option(ldap.OPT_X_TLS_CACERTFILE)
-                sys_cert_dir = ldap.get_option(ldap.OPT_X_TLS_CACERTDIR)
                 log.info("using system certificate file:  %r or system "
-                         "certificate dir %r", sys_cert_file, sys_cert_dir)
+                         "certificate dir %r", cls.SYS_CERTFILE,
+                         cls.SYS_CERTDIR)
 
             # if there is a cert given we create a temporary test cert file
             cert = l_config['CACERTIFICATE'].strip().replace('\r\n', '\n')
             if cert:
                 # preserve the old cert
-                old_cert_file = ldap.get_option(ldap.OPT_X_TLS_CACERTFILE)
+                old_cert_file = cls.SYS_CERTFILE
 
                 # use a temporary cert file
                 tmp_certfile = os.path.join(cls.cert_dir,
                                             "linotp_test_cacerts.pem")
 
                 # put all certs in a set
-                test_certs = set(cls.ca_certs_dict.values())
+                test_certs = set(cls.ca_certs_set)
                 # including the test one
                 test_certs.add(cert)
 
@@ -488,9 +1071,14 @@ class IdResolver(UserIdResolver):
             if trace_level != 0:
                 ldap.set_option(ldap.OPT_DEBUG_LEVEL, 4095)
 
+            # the bind password is decrypted only once for all uris
+
+            bind_dn = l_config['BINDDN']
+            bind_pw = l_config['BINDPW'].get_unencrypted()
+
             failed = None
 
-            for s_uri in uri.split(','):
+            for s_uri in _parse_uri_list(uri):
 
                 log.info("testing connection with uri %r", s_uri)
 
@@ -502,10 +1090,8 @@ class IdResolver(UserIdResolver):
                     # try to authenticate to server:
                     # this will establish the first connection
 
-                    bind_dn = l_config['BINDDN']
-                    bind_pw = l_config['BINDPW'].get_unencrypted()
-
                     l_obj.simple_bind_s(bind_dn, bind_pw)
+                    bound_uri = s_uri.strip()
 
                     # simple_bind will raise an exception if the server
                     # could not be reached or an error occurs - thus the
@@ -525,20 +1111,64 @@ class IdResolver(UserIdResolver):
 
             sizelimit = l_config["SIZELIMIT"]
 
-            ldap_result_id = l_obj.search_ext(l_config['LDAPBASE'],
-                                              ldap.SCOPE_SUBTREE,
-                                              filterstr=searchFilter,
-                                              sizelimit=sizelimit)
-            while 1:
-                userdata = {}
-                result_type, result_data = l_obj.result(ldap_result_id, 0)
-                if (result_data == []):
+            # the search is done with the paged results control, so that
+            # the server returns the result set page by page. As a search
+            # with a sizelimit would fail with SIZELIMIT_EXCEEDED and drop
+            # the entries of the page, the page size is restricted to the
+            # sizelimit instead
+
+            limit_size = sizelimit > 0
+            page_size = sizelimit if limit_size else DEFAULT_PAGE_SIZE
+
+            page_ctrl = SimplePagedResultsControl(
+                True, size=page_size, cookie='')
+
+            # with server side sort the pages are returned in a stable order
+
+            sort_ctrls = []
+            if l_config['SERVERSIDESORT']:
+                sort_ctrls = _server_side_sort_controls(
+                    l_obj, bound_uri, l_config['LOGINNAMEATTRIBUTE'])
+
+            while True:
+                ldap_result_id = l_obj.search_ext(
+                    l_config['LDAPBASE'], ldap.SCOPE_SUBTREE,
+                    filterstr=searchFilter,
+                    serverctrls=[page_ctrl] + sort_ctrls)
+
+                (_result_type, result_data,
+                 _msgid, serverctrls) = l_obj.result3(ldap_result_id)
+
+                for account_dn, _account_info in result_data:
+                    # compose response as we like it
+                    if account_dn:
+                        resultList.append({'userid': account_dn})
+
+                cookies = [
+                    ctrl.cookie for ctrl in serverctrls
+                    if ctrl.controlType == SimplePagedResultsControl.controlType]
+
+                if not cookies or not cookies[0]:
                     break
-                else:
-                    if result_type == ldap.RES_SEARCH_ENTRY:
-                        # compose response as we like it
-                        userdata["userid"] = result_data[0][0]
-                        resultList.append(userdata)
+
+                page_ctrl.cookie = cookies[0]
+
+                # if the sizelimit is reached, the server side result set
+                # is released by a page request of size 0
+
+                if limit_size and len(resultList) >= sizelimit:
+                    page_ctrl.size = 0
+
+                    ldap_result_id = l_obj.search_ext(
+                        l_config['LDAPBASE'], ldap.SCOPE_SUBTREE,
+                        filterstr=searchFilter,
+                        serverctrls=[page_ctrl] + sort_ctrls)
+
+                    l_obj.result3(ldap_result_id)
+                    break
+
+            if limit_size:
+                resultList = resultList[:sizelimit]
 
         except ldap.SIZELIMIT_EXCEEDED as exx:
             if len(resultList) < sizelimit:
@@ -577,16 +1207,25 @@ class IdResolver(UserIdResolver):
         Initialize the ldap resolver class
         """
         self.filter = ""
+        self._ufilter = None
+        self._ufilter_parts = None
         self.searchfilter = ""
+        self._searchfilter_macros = True
+        self._resolver_id = None
         self.ldapuri = ""
+        self._urilist = ()
         self.base = ""
         self.binddn = ""
         self.bindpw = ""
+        self._bindpw_plain = None
         self.loginnameattribute = ""
         self.userinfo = {}
+        self._userinfo_items = ()
+        self._attrlist = None
+        self._userinfo_cache = {}
         self.network_timeout = 10
         self.bind_not_possible = False
-        self.bind_not_possible_time = datetime.now()
+        self.bind_not_possible_time = time.monotonic()
         self.response_timeout = TIMEOUT_NO_LIMIT
         self.brokenconfig = False
         self.brokenconfig_text = ""
@@ -595,8 +1234,27 @@ class IdResolver(UserIdResolver):
         self.enforce_tls = False
         self.proxy = False
         self.uidType = DEFAULT_UID_TYPE
+        self._ad = None
+        self.uid_search_scope = UID_SEARCH_SCOPES[DEFAULT_UID_SEARCH_SCOPE]
+        self.server_side_sort = False
         self.l_obj = None
         self.only_trusted_certs = False
+        self.cacertificate = ""
+        self._certificate_registered = False
+
+        # the lookup cache is only used for a loaded resolver config
+        self.cache_timeout = 0
+        self.negative_cache_timeout = 0
+        self.cache_key = None
+
+        # the connections are only pooled for a loaded resolver config
+        self.pool_size = 0
+        self.pool_min_size = 0
+        self.pool_key = None
+        self.l_obj_uri = None
+
+        # the message id of a submitted search, which result is not read
+        self._pending_msgid = None
 
     def close(self):
         """
@@ -607,6 +1265,22 @@ class IdResolver(UserIdResolver):
         try:
             if self.l_obj is not None:
 
+                # keep the bound connection for the next request - but only
+                # if there is no search outstanding, which result would be
+                # received by the next user of the connection
+
+                if self.pool_size > 0 and self._pending_msgid is None:
+                    self.connection_pool.release(
+                        (self.pool_key, self.l_obj_uri), self.l_obj,
+                        self.pool_size)
+                    return
+
+                if self._pending_msgid is not None:
+                    try:
+                        self.l_obj.abandon_ext(self._pending_msgid)
+                    except ldap.LDAPError as exx:
+                        log.info("failed to abandon the search: %r", exx)
+
                 # on close restore the system settings
                 if self.SYS_CERTFILE and os.path.isfile(self.SYS_CERTFILE):
                     self.l_obj.set_option(ldap.OPT_X_TLS_CACERTFILE,
@@ -623,6 +1297,7 @@ class IdResolver(UserIdResolver):
 
         finally:
             self.l_obj = None
+            self._pending_msgid = None
 
     def bind(self):
         """
@@ -632,21 +1307,57 @@ class IdResolver(UserIdResolver):
         if self.l_obj is not None:
             return self.l_obj
 
+        # if the bind to all servers failed recently, we dont retry before
+        # the BIND_NOT_POSSIBLE_TIMEOUT is expired
+
+        now = time.monotonic()
+
+        if (self.bind_not_possible and
+           now - self.bind_not_possible_time < BIND_NOT_POSSIBLE_TIMEOUT):
+
+            log.info("[bind] bind recently failed - not retrying before "
+                     "%r seconds", BIND_NOT_POSSIBLE_TIMEOUT)
+
+            raise ResolverNotAvailable("Bind to servers %r recently failed" %
+                                       self.ldapuri)
+
         # iterate through the ldap uris
 
-        urilist = string_to_list(self.ldapuri)
+        # the blocking state of the uris is kept in the global resource
+        # registry, so a new scheduler per bind still skips blocked uris
+
+        urilist = self._urilist or _parse_uri_list(self.ldapuri)
         log.debug("[bind] trying to bind to one of the servers: %r", urilist)
 
         resource_scheduler = ResourceScheduler(tries=2, uri_list=urilist)
 
         for uri in next(resource_scheduler):
+
+            # prefer an already bound connection from the pool
+
+            if self.pool_size > 0:
+                l_obj = self.connection_pool.acquire((self.pool_key, uri))
+
+                # refill the pool in the background for the next request
+                if self.pool_min_size > 0:
+                    self._warm_pool(uri)
+
+                if l_obj is not None:
+                    log.debug("[bind] using pooled connection to %r", uri)
+                    self.l_obj = l_obj
+                    self.l_obj_uri = uri
+                    self.bind_not_possible = False
+                    return l_obj
+
             try:
+                self._register_certificate_once()
                 l_obj = IdResolver.connect(uri, caller=self)
 
-                l_obj.simple_bind_s(
-                    self.binddn, self.bindpw.get_unencrypted())
+                l_obj.simple_bind_s(self.binddn, self._get_bindpw())
 
                 self.l_obj = l_obj
+                self.l_obj_uri = uri
+                self.bind_not_possible = False
                 return l_obj
 
             except ldap.LDAPError as _error:
@@ -657,8 +1368,53 @@ class IdResolver(UserIdResolver):
 
         log.error('Failed to bind to any resource %r', urilist)
 
-        raise ResolverNotAvailable("Unable to bind to servers %r" % urilist)
+        self.bind_not_possible = True
+        self.bind_not_possible_time = now
+
+        raise ResolverNotAvailable("Unable to bind to servers %r" %
+                                   list(urilist))
+
+
+    def _warm_pool(self, uri):
+        """
+        helper - keep pre bound connections to the uri in the pool, which
+        are established by a background thread
+
+        the background thread keeps neither the resolver instance nor the
+        unencrypted bind password - the password is decrypted per bind
+
+        :param uri: the ldap server uri
+        """
+
+        self._register_certificate_once()
+
+        connect = functools.partial(
+            _connect_and_bind, uri, _ConnectOptions(self), self.binddn,
+            _password_getter(self.bindpw))
 
+        self.connection_pool.warm((self.pool_key, uri), connect,
+                                  self.pool_min_size, self.pool_size)
+
+    def _register_certificate_once(self):
+        """
+        helper - register the certificate of the resolver definition before
+        the first connect of the resolver instance
+        """
+        if not self._certificate_registered:
+            self.register_certificate(self.cacertificate)
+            self._certificate_registered = True
+
+    def _get_bindpw(self):
+        """
+        helper - get the bind password, which is decrypted only once per
+        resolver instance
+
+        :return: the unencrypted bind password
+        """
+        if self._bindpw_plain is None:
+            self._bindpw_plain = self.bindpw.get_unencrypted()
+
+        return self._bindpw_plain
 
     def unbind(self, lobj):
         """
@@ -687,25 +1443,38 @@ class IdResolver(UserIdResolver):
         if not loginname:
             return ''
 
-        ufilter = self._replace_macros(self.filter)
-        fil = ldap.filter.filter_format(ufilter,[loginname])
+        # unknown users are cached as well, with the empty userid and the
+        # shorter negative cache timeout
+
+        cache_key = None
+        if self.cache_timeout > 0 or self.negative_cache_timeout > 0:
+            cache_key = (self.cache_key, 'userid', loginname)
+            userid = self.lookup_cache.get(cache_key)
+            if userid is not None:
+                log.debug("[getUserId] cache hit for %r", loginname)
+                return userid
+
+        # the user filter is prepared on loadConfig, if it is constant
+
+        if self._ufilter_parts:
+            prefix, suffix = self._ufilter_parts
+            fil = prefix + _escape_filter_value(loginname) + suffix
+        else:
+            ufilter = self._ufilter or self._replace_macros(self.filter)
+            fil = ldap.filter.filter_format(ufilter, [loginname])
         l_obj = self.bind()
 
         if not l_obj:
             return ''
 
-        # ----------------------------------------------------------------- --
-
-        # prepare the list of attributes that we wish to recieve
-        # Remark: the elememnts each must be of type string utf-8
-
-        attrlist = []
-        if self.uidType.lower() != "dn":
-            attrlist.append(self.uidType)
+        # beside the uid we request as well the user info attributes, so
+        # that a following getUserInfo or getUsername for the user could
+        # be served from the lookup cache without an additional search
 
-        # ----------------------------------------------------------------- --
+        attrlist = self._attrlist or self._get_attrlist()
 
         resultList = None
+        lookup_failed = False
         try:
             # log.error("%r : %r" % (self.uidType, attrlist))
             l_id = l_obj.search_ext(self.base,
@@ -715,17 +1484,25 @@ class IdResolver(UserIdResolver):
                                     attrlist=attrlist,
                                     timeout=self.response_timeout)
 
+            # until the result is read, the search is outstanding and the
+            # connection must not be pooled
+
+            self._pending_msgid = l_id
             resultList = l_obj.result(l_id, all=1)[1]
+            self._pending_msgid = None
 
         except ldap.LDAPError as exc:
             log.exception("[getUserId] LDAP error: %r", exc)
             resultList = None
+            lookup_failed = True
 
         finally:
             self.unbind(l_obj)
 
         if not resultList:
             log.info("[getUserId] : empty result ")
+            if not lookup_failed:
+                self._cache_unknown_user(cache_key)
             return ''
 
         #
@@ -741,6 +1518,7 @@ class IdResolver(UserIdResolver):
 
         if not relevant_entries:
             log.info("[getUserId] : empty result ")
+            self._cache_unknown_user(cache_key)
             return ''
 
         log.debug("[getUserId] : resultList :%r: ", resultList)
@@ -753,10 +1531,33 @@ class IdResolver(UserIdResolver):
         if not userid:
             log.info("[getUserId] : empty result for  %r - uidtype: %r",
                      loginname, self.uidType.lower())
+            self._cache_unknown_user(cache_key)
         else:
             log.debug("[getUserId] userid: %r:%r", type(userid), userid)
 
-        return userid
+            # the user info is kept, so that a following getUserInfo or
+            # checkPass for the user in the same request needs no search
+
+            userinfo = self._get_userinfo_from_result(resultList[0])
+            self._userinfo_cache[userid] = userinfo
+
+            if cache_key and self.cache_timeout > 0:
+                self.lookup_cache.set(cache_key, userid, self.cache_timeout)
+                self.lookup_cache.set(
+                    (self.cache_key, 'userinfo', userid),
+                    userinfo, self.cache_timeout)
+
+        return userid
+
+    def _cache_unknown_user(self, cache_key):
+        """
+        helper - remember, that the user lookup did not find a user, so
+        that repeated lookups of an unknown user are not sent to the server
+
+        :param cache_key: the lookup cache key of the login name or None
+        """
+        if cache_key and self.negative_cache_timeout > 0:
+            self.lookup_cache.set(cache_key, '', self.negative_cache_timeout)
 
     def getUsername(self, userid):
         '''
@@ -799,12 +1600,33 @@ class IdResolver(UserIdResolver):
         if isinstance(userid, bytes):
             userid = userid.decode('utf-8')
 
+        # the resolver instance lives for one request, where the user info
+        # is often required more than once, e.g. by checkPass and getUserInfo
+
+        userinfo = self._userinfo_cache.get(userid)
+        if userinfo is not None:
+            return userinfo
+
+        cache_key = None
+        if self.cache_timeout > 0:
+            cache_key = (self.cache_key, 'userinfo', userid)
+            userinfo = self.lookup_cache.get(cache_key)
+            if userinfo is not None:
+                log.debug("[getUserLDAPInfo] cache hit for %r", userid)
+                self._userinfo_cache[userid] = userinfo
+                return userinfo
+
         l_id = 0
         l_obj = self.bind()
 
         if not l_obj:
             return {}
 
+        # only the attributes of the user info are requested and not all
+        # attributes of the user entry
+
+        attrlist = self._attrlist or self._get_attrlist()
+
         result_data = None
 
         try:
@@ -813,12 +1635,14 @@ class IdResolver(UserIdResolver):
                 l_id = l_obj.search_ext(userid,
                                         ldap.SCOPE_BASE,
                                         filterstr="ObjectClass=*",
+                                        attrlist=attrlist,
                                         sizelimit=self.sizelimit)
 
             elif self.uidType.lower() == "objectguid":
                 if not self.proxy:
                     l_id = l_obj.search_ext("<guid=%s>" % (userid),
                                             ldap.SCOPE_BASE,
+                                            attrlist=attrlist,
                                             sizelimit=self.sizelimit,
                                             timeout=self.response_timeout)
                 else:
@@ -828,6 +1652,7 @@ class IdResolver(UserIdResolver):
                     l_id = l_obj.search_ext(self.base,
                                             ldap.SCOPE_SUBTREE,
                                             filterstr=filterstr,
+                                            attrlist=attrlist,
                                             sizelimit=self.sizelimit,
                                             timeout=self.response_timeout)
             else:
@@ -838,16 +1663,28 @@ class IdResolver(UserIdResolver):
                 # we have to build up the search filter which must end up
                 # in an uft-8 encoding
 
-                filterstr = "(%s=%s)" % (self.uidType,userid)
+                # remark: if all users are located directly below the base,
+                # the search could be restricted with the UIDSEARCHSCOPE
+                # 'one'. As the uid attribute is searched for every lookup,
+                # it should be indexed on the ldap server
+
+                # the userid is matched exactly, so all special characters
+                # of the filter syntax are escaped - the attribute is not
+
+                filterstr = "(%s=%s)" % (
+                    self.uidType, ldap.filter.escape_filter_chars(userid))
 
                 l_id = l_obj.search_ext(
                                     self.base,
-                                    ldap.SCOPE_SUBTREE,
+                                    self.uid_search_scope,
                                     filterstr=filterstr,
+                                    attrlist=attrlist,
                                     sizelimit=self.sizelimit,
                                     timeout=self.response_timeout)
 
+            self._pending_msgid = l_id
             result_data = l_obj.result(l_id, all=1)[1]
+            self._pending_msgid = None
 
         except ldap.LDAPError as error:
             log.exception("[getUserLDAPInfo] LDAP error")
@@ -860,36 +1697,68 @@ class IdResolver(UserIdResolver):
         if not result_data:
             return {}
 
-        # ------------------------------------------------------------------ --
+        userinfo = self._get_userinfo_from_result(result_data[0])
+        self._userinfo_cache[userid] = userinfo
 
-        # process result and put it in the userinfo dict
+        if cache_key:
+            self.lookup_cache.set(cache_key, userinfo, self.cache_timeout)
 
-        userinfo = {}
+        return userinfo
+
+    def _get_attrlist(self):
+        """
+        helper - build the list of attributes, which are requested for a user
 
-        result = result_data[0]
+        beside the user info attributes the login name and the uid attribute
+        are requested, so that never all attributes of an user entry are
+        returned by the ldap server.
 
-        # add the dn which is the first entry
-        userinfo['dn'] = [result[0]]
+        Remark: the elememnts each must be of type string utf-8
 
-        # add the the other key, [values] from the second result entry
-        for key, uval in result[1].items():
+        :return: sorted list of the attribute names
+        """
+
+        attributes = set(self.userinfo.values())
+        attributes.add(self.loginnameattribute)
 
-            entries = []
-            for udata in uval:
+        if self.uidType.lower() == "objectguid":
+            # the binary objectGUID is converted by its canonical name
+            attributes.add('objectGUID')
+        else:
+            attributes.add(self.uidType)
 
-                if key == 'objectGUID':
-                    udata = self.guid2str(udata)
+        return sorted(attr for attr in attributes
+                      if attr and attr.lower() != "dn")
 
-                if isinstance(udata, bytes):
-                    try:
-                        udata = udata.decode()
-                    except Exception as _exx:
-                        log.warning('Failed to convert entry %r: %r',
-                                    key, udata)
+    def _get_userinfo_from_result(self, result):
+        """
+        process the ldap result entry and put it in the userinfo dict
+
+        :param result: the ldap result entry tuple of dn and attribute dict
+        :return: user info dict with the list of values per attribute
+        """
+
+        userinfo = {}
+
+        # add the dn which is the first entry
+        userinfo['dn'] = [result[0]]
 
-                entries.append(udata)
+        # add the the other key, [values] from the second result entry:
+        # the binary objectGUID requires a special conversion, the other
+        # binary attributes are kept as bytes and all other values are
+        # utf-8 where undecodable bytes are replaced
 
-            userinfo[key] = entries
+        for key, uval in result[1].items():
+
+            if key == 'objectGUID':
+                userinfo[key] = [self.guid2str(udata) for udata in uval]
+            elif key in _BINARY_ATTRIBUTES:
+                userinfo[key] = list(uval)
+            else:
+                userinfo[key] = [
+                    udata.decode('utf-8', 'replace')
+                    if isinstance(udata, bytes) else udata
+                    for udata in uval]
 
         return userinfo
 
@@ -924,26 +1793,19 @@ class IdResolver(UserIdResolver):
         if not user:
             return {}
 
-        ret = {}
-
-        ret['userid'] = userid
+        ret = {'userid': userid}
 
         # we will add all userinfo fields!
 
-        for f in self.userinfo:
+        for user_key, ldap_key in (self._userinfo_items or
+                                   self.userinfo.items()):
 
-            val = ''
-            if self.userinfo[f] in user:
+            values = user.get(ldap_key)
+            if not values:
+                ret[user_key] = ''
+                continue
 
-                val = user[self.userinfo[f]][0]
-
-                if isinstance(val, bytes):
-                    try:
-                        val = val.decode()
-                    except:
-                        log.info('unable to decode bytes %r', val)
-
-            ret[f] = val
+            ret[user_key] = values[0]
 
         return ret
 
@@ -956,11 +1818,26 @@ class IdResolver(UserIdResolver):
         :rtype: string
 
         '''
-        log.debug("[getResolverId]")
-        resolver = "LDAPIdResolver.IdResolver"
-        if self.conf != "":
-            resolver = resolver + "." + self.conf
-        return resolver
+        if self._resolver_id is None:
+            self._resolver_id = "LDAPIdResolver.IdResolver"
+            if self.conf != "":
+                self._resolver_id += "." + self.conf
+
+        return self._resolver_id
+
+    @classmethod
+    def delete_lookup_cache(cls, conf):
+        """
+        remove the cached user lookups of a resolver definition - called
+        when the user lookup cache of linotp is invalidated
+
+        :param conf: the configuration identifier of the resolver
+        """
+        resolver_id = "LDAPIdResolver.IdResolver"
+        if conf:
+            resolver_id += "." + conf
+
+        cls.lookup_cache.remove_resolver_entries(resolver_id)
 
     def getConfigEntry(self, config, key, conf, required=True, default=""):
         '''
@@ -1081,6 +1958,10 @@ class IdResolver(UserIdResolver):
         '''
 
         self.conf = conf
+        self._resolver_id = None
+
+        # the user info of this resolver instance is (re)loaded on demand
+        self._userinfo_cache = {}
 
         # ------------------------------------------------------------------ --
 
@@ -1105,23 +1986,64 @@ class IdResolver(UserIdResolver):
         # process and assign the config entries
 
         self.ldapuri = l_config["LDAPURI"]
+        self._urilist = _parse_uri_list(self.ldapuri)
         self.base = l_config["LDAPBASE"]
         self.binddn = l_config["BINDDN"]
         self.bindpw = l_config["BINDPW"]
+        self._bindpw_plain = None
 
         self.filter = l_config["LDAPFILTER"]
         self.searchfilter = l_config["LDAPSEARCHFILTER"]
 
+        # a user filter without macros like %(now)s is constant, so it does
+        # not have to be processed on every user lookup
+
+        self._ufilter = None
+        if '%(' not in self.filter:
+            self._ufilter = self.filter
+
+        # a constant user filter with the login name as only placeholder
+        # is split into the parts around the escaped login name
+
+        self._ufilter_parts = None
+        if self._ufilter and self._ufilter.count('%') == 1 and (
+                '%s' in self._ufilter):
+            self._ufilter_parts = tuple(self._ufilter.split('%s'))
+
+        self._searchfilter_macros = '%(' in self.searchfilter
+
         self.loginnameattribute = l_config["LOGINNAMEATTRIBUTE"]
         self.uidType = l_config["UIDTYPE"]
 
+        # the AD check depends only on the filters and the login attribute
+        self._ad = None
+        self._ad = self._is_ad()
+
+        uid_search_scope = l_config["UIDSEARCHSCOPE"].strip().lower()
+        if uid_search_scope not in UID_SEARCH_SCOPES:
+            raise ResolverLoadConfigError("Invalid uid search scope %r - "
+                                          "supported are %r" %
+                                          (uid_search_scope,
+                                           sorted(UID_SEARCH_SCOPES)))
+
+        self.uid_search_scope = UID_SEARCH_SCOPES[uid_search_scope]
+
+        self.server_side_sort = l_config["SERVERSIDESORT"]
+
         try:
-            self.userinfo = json.loads(l_config["USERINFO"])
+            userinfo_items = _parse_userinfo(l_config["USERINFO"])
         except ValueError as exx:
             raise ResolverLoadConfigError("Invalid userinfo - no json"
                                           " document: %s %r" %
                                           (l_config["USERINFO"], exx))
 
+        # the requested user attributes and the mapping of the attributes
+        # only depend on the configuration
+
+        self.userinfo = dict(userinfo_items)
+        self._userinfo_items = userinfo_items
+        self._attrlist = self._get_attrlist()
+
         # ------------------------------------------------------------------ --
 
         # certificate related parameters
@@ -1131,8 +2053,11 @@ class IdResolver(UserIdResolver):
         self.use_sys_cert = l_config["linotp.certificates."
                                      "use_system_certificates"]
 
+        # the certificate is registered on the first connect, as many
+        # resolver instances never connect to their server
+
         self.cacertificate = l_config["CACERTIFICATE"]
-        self.register_certificate(self.cacertificate)
+        self._certificate_registered = False
 
         # ------------------------------------------------------------------ --
 
@@ -1147,6 +2072,40 @@ class IdResolver(UserIdResolver):
         self.noreferrals = l_config["NOREFERRALS"]
         self.proxy = l_config["PROXY"]
 
+        # ------------------------------------------------------------------ --
+
+        # lookup cache related parameters: the cache key contains all
+        # parameters which have an impact on the lookup results, so that a
+        # changed resolver definition will not access outdated entries.
+        # The lookup cache is opt-in and disabled as well, if the user
+        # lookup cache of linotp is disabled
+
+        self.cache_timeout = 0
+        self.negative_cache_timeout = 0
+
+        if l_config["linotp.user_lookup_cache.enabled"]:
+            self.cache_timeout = l_config["CACHETIMEOUT"]
+            self.negative_cache_timeout = l_config["NEGATIVECACHETIMEOUT"]
+
+        self.cache_key = (self.getResolverId(), self.ldapuri, self.base,
+                          self.binddn, self.filter, self.uidType,
+                          self.loginnameattribute, l_config["USERINFO"])
+
+        # ------------------------------------------------------------------ --
+
+        # connection pool related parameters: connections are only shared
+        # between resolvers with the same connection and bind parameters
+
+        self.pool_size = l_config["POOLSIZE"]
+        self.pool_min_size = min(l_config["POOLMINSIZE"], self.pool_size)
+        # the trust and the credentials are part of the key as well, where
+        # only the digests of the certificate and the encrypted bind
+        # password are kept
+
+        self.pool_key = (self.getResolverId(), self.binddn, self.enforce_tls,
+                         self.use_sys_cert, self.noreferrals, timeout,
+                         _digest(self.cacertificate), _digest(self.bindpw))
+
         return self
 
     @classmethod
@@ -1162,25 +2121,59 @@ class IdResolver(UserIdResolver):
         if not cacertificate:
             return
 
-        cert_hash = sha1(cacertificate.encode('utf-8')).hexdigest()
+        # the certificate of an unchanged resolver definition is already
+        # registered - then only the existance of the cert file is checked
+
+        if (cacertificate in cls.registered_certificates and
+           _is_cert_file(cls.CERTFILE)):
+            return
+
+        # the certificates are stored in the same normalized form as in setup
+        cert = cacertificate.strip().replace('\r\n', '\n')
+
+        # get last modified of local cert file - the file modification time
+        # is compared as is, without a conversion into a datetime
 
-        # get last modified of local cert file
         try:
             mtime = os.path.getmtime(cls.CERTFILE)
         except OSError:
             mtime = 0
 
-        last_modified_date = datetime.fromtimestamp(mtime)
-
-        if (cert_hash not in cls.ca_certs_dict or
-           last_modified_date > cls.CERTFILE_last_modified):
+        # the cert file is only rewritten if the certificate is new or if
+        # the file has been modified in between
 
-            IdResolver.ca_certs_dict[cert_hash] = cacertificate
+        if (cls.add_ca_certificate(cert) or
+           mtime > cls.CERTFILE_last_modified):
 
             _add_cacertificates_to_file(cls.CERTFILE,
-                                        list(IdResolver.ca_certs_dict.values()))
+                                        IdResolver.ca_certs_sorted)
+
+            try:
+                mtime = os.path.getmtime(cls.CERTFILE)
+            except OSError:
+                mtime = 0
+
+            IdResolver.CERTFILE_last_modified = mtime
+
+        IdResolver.registered_certificates.add(cacertificate)
+
+    @classmethod
+    def add_ca_certificate(cls, cert: str) -> bool:
+        """
+        add a normalized certificate to the set and the sorted list of the
+        ca certificates
+
+        :param cert: the normalized certificate
+        :return: boolean - True if the certificate was not yet known
+        """
 
-            IdResolver.CERTFILE_last_modified = last_modified_date
+        if cert in IdResolver.ca_certs_set:
+            return False
+
+        IdResolver.ca_certs_set.add(cert)
+        bisect.insort(IdResolver.ca_certs_sorted, cert)
+
+        return True
 
     def getSearchFields(self, searchDict=None):
         '''
@@ -1231,7 +2224,7 @@ class IdResolver(UserIdResolver):
 
         log.debug("[checkPass] DN: %r", DN)
 
-        urilist = string_to_list(self.ldapuri)
+        urilist = self._urilist or _parse_uri_list(self.ldapuri)
 
         log.debug("[checkPass] we will try to authenticate to these LDAP "
                   "servers: %r", urilist)
@@ -1241,17 +2234,33 @@ class IdResolver(UserIdResolver):
 
         for uri in next(resource_scheduler):
             l_obj = None
+
+            # the connections for the password check are pooled separately
+            # from the connections bound as the service account, so that
+            # a connection bound as a user is only used for the next user bind
+
+            pool_key = (self.pool_key, uri, 'checkPass')
+            reusable = False
+
             try:
                 log.info("[checkPass] check password for user %r "
                          "on LDAP server %r", DN, uri)
-                l_obj = IdResolver.connect(uri, caller=self)
+
+                if self.pool_size > 0:
+                    l_obj = self.connection_pool.acquire(pool_key)
+
+                if l_obj is None:
+                    self._register_certificate_once()
+                    l_obj = IdResolver.connect(uri, caller=self)
 
                 l_obj.simple_bind_s(DN, password)
                 log.info("[checkPass] ldap bind for %r successful", DN)
+                reusable = True
                 return True
 
             except ldap.INVALID_CREDENTIALS as error:
                 log.warning("[checkPass] invalid credentials: %r", error)
+                reusable = True
                 return False
 
             except ldap.LDAPError as error:
@@ -1261,14 +2270,19 @@ class IdResolver(UserIdResolver):
 
             finally:
                 if l_obj is not None:
-                    l_obj.unbind_s()
+                    if reusable and self.pool_size > 0:
+                        self.connection_pool.release(
+                            pool_key, l_obj, self.pool_size)
+                    else:
+                        l_obj.unbind_s()
 
         log.error("[checkPass] failed to connect to any resource %r", urilist)
 
         if last_error:
             log.error("[checkPass] access to resource failed: %r", last_error)
 
-        raise ResolverNotAvailable("unable to bind to servers %r" % urilist)
+        raise ResolverNotAvailable("unable to bind to servers %r" %
+                                   list(urilist))
 
 
     @staticmethod
@@ -1282,10 +2296,13 @@ class IdResolver(UserIdResolver):
 
         :return: string representation of the guid
         :rtype:  string
+
+        remark: the guid is represented in the byte order of the binary
+                value, as this representation is stored as userid and is
+                used for the <guid=...> and the ObjectGUID search
         '''
         log.debug("[guid2str] converting MS AD GUID: %r", guid)
-        res = binascii.hexlify(guid)
-        return res
+        return guid.hex()
 
     def _is_ad(self):
         """
@@ -1293,6 +2310,10 @@ class IdResolver(UserIdResolver):
         check is running against the ldap config where we expect to have an
         sAMAccountname in any filter or login attribute
         """
+        # the check result is prepared on loadConfig
+        if self._ad is not None:
+            return self._ad
+
         ret = False
         if ('sAMAccountName' in self.loginnameattribute or
             'sAMAccountName' in self.searchfilter or
@@ -1314,15 +2335,10 @@ class IdResolver(UserIdResolver):
                 we set this as default
         """
         # unix timestamp, which starts at 1/1/1970
-        now = int(datetime.now().strftime("%s"))
+        now = int(time.time())
         if self._is_ad():
-            # 116444736000000000 = 31/12/1601
-            add_seconds = 116444736000000000
             # we only care for account expiration
-            account_expiry = True
-            if account_expiry:
-                add_seconds += 86400
-            now = ((now * 10000000) + add_seconds)
+            now = ((now * 10000000) + AD_ACCOUNT_EXPIRY_OFFSET)
         return now
 
     def _replace_macros(self, expression):
@@ -1335,101 +2351,177 @@ class IdResolver(UserIdResolver):
         :param expression: string where macros should be replaced
         :return: substituted string
         """
-        substitute = expression
-        special_dict = {}
-        special_dict['now'] = self.now_timestamp()
+        # the %(now)s is the only supported macro - the expression could
+        # contain other format chars like the %s of the user filter, so
+        # the python % formatting could not be used
 
-        try:
-            for key, val in list(special_dict.items()):
-                search_st = "%(" + key + ")s"
-                if search_st in substitute:
-                    substitute = substitute.replace(search_st, val)
-        except KeyError as key_error:
-            log.exception('Key replacement error %r', key_error)
-            raise key_error
-        return substitute
+        if '%(now)s' not in expression:
+            return expression
+
+        return expression.replace('%(now)s', str(self.now_timestamp()))
 
     def getUserList(self, searchDict):
         '''
         retrieve a list of users
 
+        the list is read by a paged search, where each page is read with one
+        result call. As a search with a sizelimit would fail with
+        SIZELIMIT_EXCEEDED and drop the entries of the result call, the page
+        size is restricted to the sizelimit. If the server does not support
+        the paging, the complete result set is returned with the first page -
+        only if it is dropped due to the server side sizelimit, the users are
+        read entry by entry with a plain search.
+
         :param searchDict: dictionary of the search criterias
         :type  searchDict: dict
         :return: resultList, a dict with user info
         '''
 
-        # TODO: check if field is searchable
-        # several filters are & concatenated:
-        #   (&(objectClass=inetOrgPerson)(uid=theodor))
-        # if we got an empty search dictionary, we will get all users!
-
         log.debug("[getUserList]")
 
-        # add specialdict replacements, to support the "%(now)s" expression
-        searchFilter = self._replace_macros(self.searchfilter)
+        searchFilter = self._prepare_searchFilter(searchDict)
+        attrlist = self._attrlist or self._get_attrlist()
 
-        log.debug("[getUserList] searchfilter: %r", searchFilter)
+        l_obj = self.bind()
+
+        log.debug("[getUserList] doing search with filter %r", searchFilter)
 
-        # add searchfilter attributes of searchDict
         try:
-            for skey, sval in searchDict.items():
-                log.debug("[getUserList] searchekys: %r / %r", skey, sval)
-                if skey in self.userinfo:
-                    key = self.userinfo[skey]
-                    value = searchDict[skey]
-                    # value and searchFilter are Unicode!
-                    searchFilter += "(%s=%s)" % (key, value)
-                else:
-                    log.warning("[getUserList] Unknown searchkey: %r", skey)
 
-            # finaly embedd the filter in the ldap query string
-            searchFilter = "(& %s )" % searchFilter
-            log.debug("[getUserList] searchfilter: %r", searchFilter)
+            resultList = self._get_user_list_paged(
+                                        l_obj, searchFilter, attrlist)
 
-        except Exception as exep:
-            log.exception("[getUserList] Error creating searchFilter: %r",
-                          exep)
-            raise exep
+            if resultList is None:
+                log.info("[getUserList] server ignores the paged results "
+                         "control and exceeds the sizelimit - using a plain "
+                         "search")
 
+                resultList = self._get_user_list_plain(
+                                        l_obj, searchFilter, attrlist)
 
-        l_obj = self.bind()
+        except ldap.LDAPError as exx:
+            log.exception("[getUserList] LDAP error: %r", exx)
+            raise exx
 
-        if not l_obj:
-            return []
+        finally:
+            self.unbind(l_obj)
 
-        log.debug("[getUserList] doing search with filter %r", searchFilter)
-        log.debug("[getUserList] type of searchfilter: %r", type(searchFilter))
+        return resultList
+
+    def _get_user_list_paged(self, l_obj, searchFilter, attrlist):
+        """
+        helper - read the user list page wise, up to the sizelimit
+
+        :param l_obj: the bound ldap connection object
+        :param searchFilter: the ldap search filter
+        :param attrlist: list of attributes, which should be returned
+        :return: the list of user info dicts or None, if the server does not
+                 support the paging and the entries are dropped as the
+                 server side sizelimit is exceeded
+        """
+
+        limit_size = self.sizelimit > 0
+        page_size = self.sizelimit if limit_size else DEFAULT_PAGE_SIZE
+
+        page_ctrl = SimplePagedResultsControl(
+            False, size=page_size, cookie='')
+
+        # the sort control has to be sent with every page request
+        sort_ctrls = []
+        if self.server_side_sort:
+            sort_ctrls = _server_side_sort_controls(
+                l_obj, self.l_obj_uri or self.ldapuri, self.loginnameattribute)
 
         resultList = []
-        try:
 
-            # ---------------------------------------------------------- --
+        while True:
 
-            # prepare the list of attributes that we wish to recieve
-            # Remark: the elememnts each must be of type string utf-8
+            self._pending_msgid = l_obj.search_ext(
+                        self.base, ldap.SCOPE_SUBTREE,
+                        filterstr=searchFilter, attrlist=attrlist,
+                        serverctrls=[page_ctrl] + sort_ctrls,
+                        timeout=self.response_timeout)
+
+            try:
+                (_result_type, result_data,
+                 _msgid, serverctrls) = l_obj.result3(
+                     self._pending_msgid, all=1,
+                     timeout=self.response_timeout)
+
+            except ldap.SIZELIMIT_EXCEEDED:
+                # the server ignored the paging and all entries are dropped
+                self._pending_msgid = None
+                return None
+
+            self._pending_msgid = None
+
+            for result_entry in result_data:
+
+                userdata = self._process_result(result_entry)
+
+                if userdata:
+                    resultList.append(userdata)
+
+            cookies = [
+                ctrl.cookie for ctrl in serverctrls
+                if ctrl.controlType == SimplePagedResultsControl.controlType]
+
+            # without the paging response control the server ignored the
+            # paging and returned the complete result set with this page
 
-            attrlist = []
-            for _ukey, uval in self.userinfo.items():
-                attrlist.append(uval)
+            if not cookies or not cookies[0]:
+                break
+
+            page_ctrl.cookie = cookies[0]
 
-            if self.uidType.lower() != "dn":
-                attrlist.append(self.uidType)
+            # if the sizelimit is reached, the server side result set is
+            # released by a page request of size 0
 
-            # ---------------------------------------------------------- --
+            if limit_size and len(resultList) >= self.sizelimit:
+                page_ctrl.size = 0
 
-            ldap_result_id = l_obj.search_ext(
+                self._pending_msgid = l_obj.search_ext(
                         self.base, ldap.SCOPE_SUBTREE,
-                        filterstr=searchFilter, sizelimit=self.sizelimit,
-                        attrlist=attrlist, timeout=self.response_timeout)
+                        filterstr=searchFilter, attrlist=attrlist,
+                        serverctrls=[page_ctrl] + sort_ctrls,
+                        timeout=self.response_timeout)
+
+                l_obj.result3(self._pending_msgid, all=1,
+                              timeout=self.response_timeout)
+                self._pending_msgid = None
+                break
 
-            log.debug('[getUserList] uidType: %r', self.uidType)
+        if limit_size:
+            return resultList[:self.sizelimit]
 
-            while 1:
+        return resultList
+
+    def _get_user_list_plain(self, l_obj, searchFilter, attrlist):
+        """
+        helper - read the user list entry by entry with a plain search
+
+        the search is restricted to the sizelimit, and when the sizelimit
+        is exceeded, the entries which are read so far are kept
+
+        :param l_obj: the bound ldap connection object
+        :param searchFilter: the ldap search filter
+        :param attrlist: list of attributes, which should be returned
+        :return: the list of user info dicts
+        """
+
+        resultList = []
+
+        self._pending_msgid = l_obj.search_ext(
+                        self.base, ldap.SCOPE_SUBTREE,
+                        filterstr=searchFilter, attrlist=attrlist,
+                        sizelimit=max(self.sizelimit, 0),
+                        timeout=self.response_timeout)
 
-                userdata = {}
+        try:
+            while True:
 
                 result_type, result_data = l_obj.result(
-                     ldap_result_id, 0, timeout=self.response_timeout)
+                     self._pending_msgid, 0, timeout=self.response_timeout)
 
                 if result_type != ldap.RES_SEARCH_ENTRY or not result_data:
                     break
@@ -1439,14 +2531,10 @@ class IdResolver(UserIdResolver):
                 if userdata:
                     resultList.append(userdata)
 
-        except ldap.LDAPError as _exce:
-            log.exception("[getUserList] LDAP error")
+        except ldap.SIZELIMIT_EXCEEDED:
+            log.info("[getUserList] sizelimit %r exceeded", self.sizelimit)
 
-        except Exception as _exce:
-            log.exception("[getUserList] error during LDAP access")
-
-        finally:
-            self.unbind(l_obj)
+        self._pending_msgid = None
 
         return resultList
 
@@ -1466,35 +2554,40 @@ class IdResolver(UserIdResolver):
 
         log.debug("[getUserList]")
 
+        searchFilter = self.searchfilter
+
         # we support special replacements in search expressions like
         # %(now)s which will be replaced by the windows or unix timestamp
-        special_dict = {}
-        special_dict['now'] = self.now_timestamp()
 
-        searchFilter = self.searchfilter
-        # add specialdict replacements, to support the "%(now)s" expression
-        try:
-            searchFilter = searchFilter % special_dict
-        except KeyError as key_error:
-            log.exception('Key replacement error %r', key_error)
-            raise key_error
+        if self._searchfilter_macros:
+            special_dict = {}
+            special_dict['now'] = self.now_timestamp()
+
+            # add specialdict replacements, to support the "%(now)s"
+            # expression
+            try:
+                searchFilter = searchFilter % special_dict
+            except KeyError as key_error:
+                log.exception('Key replacement error %r', key_error)
+                raise key_error
 
         log.debug("[getUserList] searchfilter: %r", searchFilter)
 
         # add searchfilter attributes of searchDict
         try:
+            filter_parts = [searchFilter]
             for skey, sval in searchDict.items():
                 log.debug("[getUserList] searchekys: %r / %r", skey, sval)
                 if skey in self.userinfo:
                     key = self.userinfo[skey]
-                    value = searchDict[skey]
                     # value and searchFilter are Unicode!
-                    searchFilter += "(%s=%s)" % (key, value)
+                    filter_parts.append(
+                        "(%s=%s)" % (key, _escape_search_value(sval)))
                 else:
                     log.warning("[getUserList] Unknown searchkey: %r", skey)
 
             # finaly embedd the filter in the ldap query string
-            searchFilter = "(& %s )" % searchFilter
+            searchFilter = "(& %s )" % "".join(filter_parts)
             log.debug("[getUserList] searchfilter: %r", searchFilter)
         except Exception as exep:
             log.exception("[getUserList] Error creating searchFilter: %r",
@@ -1518,8 +2611,8 @@ class IdResolver(UserIdResolver):
         """
         page_size = 100
         # we take the sizelimit as hint for the page size
-        if hasattr(self, "sizelimit"):
-            page_size = self.sizelimit // 4
+        if getattr(self, "sizelimit", 0) > 0:
+            page_size = max(self.sizelimit // 4, 1)
 
         # first request: if lc is not set, we are initializing
         if lc is None:
@@ -1554,30 +2647,47 @@ class IdResolver(UserIdResolver):
             if not cookie:
                 return (None, None, None)
 
+        serverctrls = [lc]
+
+        # the sort control has to be sent with every page request
+        if self.server_side_sort and api_ver == 2.4:
+            serverctrls += _server_side_sort_controls(
+                l_obj, self.l_obj_uri or self.ldapuri, self.loginnameattribute)
+
         # submit search request
         msgid = l_obj.search_ext(self.base,
                                  ldap.SCOPE_SUBTREE,
                                  filterstr=searchFilter,
                                  attrlist=attrlist,
-                                 serverctrls=[lc],
+                                 serverctrls=serverctrls,
                                  timeout=self.response_timeout
             )
 
+        self._pending_msgid = msgid
+
         return (msgid, l_obj, lc)
 
-    def _api_version(self):
+    @classmethod
+    def _api_version(cls):
         """
         helper method to detect if the python ldap module supports cursoring
          * debian python-ldap==2.3.11 has support, while pip python-ldap-2.4.19
            has not :-(
+
+        the api of the ldap module does not change, so it is detected once
         :return: True or False
         """
+        if IdResolver.api_ver is not None:
+            return IdResolver.api_ver
+
         ret = 2.3
         try:
             _PAGE_OID = ldap.LDAP_CONTROL_PAGE_OID
         except AttributeError as _exx:
             log.info('using the 2.4 cursoring api.')
             ret = 2.4
+
+        IdResolver.api_ver = ret
         return ret
 
     def getUserListIterator(self, searchDict, limit_size=True):
@@ -1593,19 +2703,10 @@ class IdResolver(UserIdResolver):
         log.debug("[getUserListIterator] doing search with filter %r",
                   searchFilter)
 
-        # ------------------------------------------------------------------ --
-
-        # prepare the list of attributes that we wish to recieve
-        # Remark: the elememnts each must be of type string utf-8
-
-        attrlist = list(self.userinfo.values())
-
-        # add the requested unique identifier if it is not the dn
+        # the list of attributes that we wish to recieve is prepared
+        # on loadConfig
 
-        if self.uidType.lower() != "dn":
-            attrlist.append(self.uidType)
-
-        # ------------------------------------------------------------------ --
+        attrlist = self._attrlist or self._get_attrlist()
 
         # replace the method pointer to the right place
         api_ver = self._api_version()
@@ -1623,7 +2724,11 @@ class IdResolver(UserIdResolver):
                 if limit_size and results_size >= self.sizelimit:
                     break
 
-                lres = l_obj.result3(msgid)
+                # the complete page is read with one result call
+                lres = l_obj.result3(msgid, all=1,
+                                     timeout=self.response_timeout)
+
+                self._pending_msgid = None
 
                 if not lres:
                     break
@@ -1682,12 +2787,14 @@ class IdResolver(UserIdResolver):
         result_dn = result[0]
         result_data = result[1]
 
+        uid_type = uidType.lower()
+
         # ------------------------------------------------------------------ --
 
         # the dn is always the first entry in the result tuple and is
         # not of type list
 
-        if uidType.lower() == "dn":
+        if uid_type == "dn":
             userid = result_dn
 
             if isinstance(userid, bytes):
@@ -1699,20 +2806,26 @@ class IdResolver(UserIdResolver):
 
         # other uid types like entryUUID or userPrincipalname ar part of the
         # result_data dict, where we do a case insensitve search for the
-        # userid type especially for the objectguid or the userPrincipalName
+        # userid type especially for the objectguid or the userPrincipalName.
+        # As the attribute is mostly returned as it was requested, the
+        # search is only done if the direct lookup fails
 
-        userid = None
-        for entry_key in result_data.keys():
-            if uidType.lower() == entry_key.lower():
-                userid = result_data.get(entry_key)[0]
+        values = result_data.get(uidType)
+
+        if values is None:
+            for entry_key, entry_values in result_data.items():
+                if uid_type == entry_key.lower():
+                    values = entry_values
+
+        userid = values[0] if values else None
 
         if not userid:
             raise Exception('No Userid found')
 
         # objectguid requires a special conversion to become readable
 
-        if uidType.lower() == "objectguid":
-            return IdResolver.guid2str(userid).decode()
+        if uid_type == "objectguid":
+            return IdResolver.guid2str(userid)
 
         if isinstance(userid, bytes):
             userid = userid.decode()
@@ -1726,45 +2839,74 @@ class IdResolver(UserIdResolver):
         :param result_data: one data entry of the ldap search response
         :return: userdata as dict
         """
-        userdata = {}
         # access account DN as 1. tupple member
         # access account info dict as 2. tupple member
-        account_dn = result_data[0]
-        account_info = result_data[1]
-
         # in case of no DN - we skip the object
-        if not account_dn:
+        if not result_data[0]:
             return {}
 
-        userdata["userid"] = self._get_uid_from_result(
-                                            result_data, self.uidType)
+        account_info = result_data[1]
+
+        userdata = {
+            "userid": self._get_uid_from_result(result_data, self.uidType)}
 
         # finally add all existing userinfos (wrt the mapping)
-        for user_key, ldap_key in self.userinfo.items():
+        for user_key, ldap_key in (self._userinfo_items or
+                                   self.userinfo.items()):
 
-            if ldap_key in account_info:
-                # An attribute can hold more than 1 value
-                # So we only take the first one at the moment
-                #   result_data[0][1][v][0]
-                # If we want to get all
-                #   result_data[0][1][v] gives us a list
+            values = account_info.get(ldap_key)
+            if not values:
+                continue
 
-                udata = account_info[ldap_key][0]
+            # An attribute can hold more than 1 value
+            # So we only take the first one at the moment
+            #   result_data[0][1][v][0]
+            # If we want to get all
+            #   result_data[0][1][v] gives us a list
 
-                if ldap_key == 'objectGUID':
-                    udata = self.guid2str(udata)
+            udata = values[0]
 
-                if isinstance(udata, bytes):
-                    try:
-                        udata = udata.decode()
-                    except:
-                        log.warning('Failed to convert entry %r: %r',
-                                    ldap_key, udata)
+            if ldap_key == 'objectGUID':
+                udata = self.guid2str(udata)
+
+            elif isinstance(udata, bytes):
+                try:
+                    udata = udata.decode('utf-8')
+                except:
+                    log.warning('Failed to convert entry %r: %r',
+                                ldap_key, udata)
 
-                userdata[user_key] = udata
+            userdata[user_key] = udata
 
         return userdata
 
+# attributes with binary values, which are not utf-8 decoded
+_BINARY_ATTRIBUTES = frozenset([
+    'objectGUID', 'objectSid', 'userCertificate', 'thumbnailPhoto',
+    'jpegPhoto', 'msExchMailboxSecurityDescriptor'])
+
+
+def _flatten(attribute, values):
+    """
+    flatten the value list of an ldap attribute into a single value or a
+    list of values
+
+    python-ldap returns the values as bytes, which are decoded with
+    replacement of the non utf-8 chars - except for the known binary
+    attributes. The values of an attribute are all of the same type, so
+    the type is only checked for the first value.
+
+    :param attribute: the name of the attribute
+    :param values: the list of the attribute values
+    :return: the single value or the list of values
+    """
+    if (isinstance(values[0], bytes) and
+            attribute not in _BINARY_ATTRIBUTES):
+        values = [value.decode(ENCODING, 'replace') for value in values]
+
+    return values[0] if len(values) == 1 else values
+
+
 def getLdapUsers(params):
 
     # ldap.set_option(ldap.OPT_X_TLS_REQUIRE_CERT, ldap.OPT_X_TLS_NEVER)
@@ -1793,41 +2935,53 @@ def getLdapUsers(params):
         searchScope = ldap.SCOPE_SUBTREE
         searchFilter = params['LDAPSEARCHFILTER']
         users = {}
-        ldap_result_id = l.search(baseDN, searchScope, searchFilter)
-        while 1:
-            rType, rData = l.result(ldap_result_id, 0)
-            if (rData == []):
+
+        # only the attributes of the user mapping and the login name are
+        # requested
+
+        userinfo_items = _parse_userinfo(params.get('USERINFO', '{}'))
+        login_attribute = sys.intern(params['LOGINNAMEATTRIBUTE'])
+        attrlist = sorted({ldap_key for _key, ldap_key in userinfo_items} |
+                          {login_attribute})
+
+        # the entries are read page wise with one result call per page
+
+        page_ctrl = SimplePagedResultsControl(
+            True, size=DEFAULT_PAGE_SIZE, cookie='')
+
+        while True:
+            msgid = l.search_ext(baseDN, searchScope, searchFilter,
+                                 attrlist=attrlist, serverctrls=[page_ctrl])
+
+            _rtype, rdata, _rmsgid, rctrls = l.result3(msgid, all=1)
+
+            for cn, data in rdata:
+
+                # skip the search references, which come without dn
+                if not cn:
+                    continue
+
+                # Flatten, just for more easy access - the attribute names
+                # are interned, so that all entries share the same keys
+
+                data = {sys.intern(k): _flatten(k, v)
+                        for k, v in data.items()}
+
+                uid = data[login_attribute]
+                data['uid'] = uid
+                users[cn] = data
+
+            # continue with the next page as long as the server returns a
+            # cookie for it
+
+            page_ctrl.cookie = None
+            for ctrl in rctrls:
+                if ctrl.controlType == SimplePagedResultsControl.controlType:
+                    page_ctrl.cookie = ctrl.cookie
+
+            if not page_ctrl.cookie:
                 break
-            else:
-                if rType == ldap.RES_SEARCH_ENTRY:
-                    cn = rData[0][0]
-                    data = rData[0][1]
-
-                    # Flatten, just for more easy access
-                    for (k, v) in list(data.items()):
-                        if len(v) == 1:
-                            if type(v[0]) == str:
-                                try:
-                                    data[k] = "%s" % v[0].decode('utf-8')
-                                except UnicodeDecodeError:
-                                    data[k] = v[0]
-                            else:
-                                data[k] = v[0]
-                        else:
-                            data[k] = []
-                            for item in v:
-                                if type(item) == str:
-                                    try:
-                                        data[k].append("%s" %
-                                                       item.decode('utf-8'))
-                                    except UnicodeDecodeError:
-                                        data[k].append(item)
-                                else:
-                                    data[k].append(item)
-
-                    uid = data[params['LOGINNAMEATTRIBUTE']]
-                    data['uid'] = uid
-                    users[cn] = data
+
         return users
     except ldap.LDAPError as e:
         print(e)
@@ -1844,9 +2998,9 @@ def simple_request(params):
     """
 
     results = getLdapUsers(params)
-    for name, entry in list(results.items()):
+    for name, entry in results.items():
         print("%s:" % name)
-        for key, value in list(entry.items()):
+        for key, value in entry.items():
             if type(value) == str:
                 print("%s:%s" % (key, value))
             else:
@@ -1873,38 +3027,40 @@ def resolver_request(params):
             if not result:
                 print("%r" % result)
             else:
-                for key, value in list(result.items()):
+                for key, value in result.items():
                     print("%s : %s" % (key.decode('utf-8'),
                                        value.decode('utf-8')))
 
 
-def get_params():
-    import json
-    user_mapping = {"username": "uid",
-                    "phone": "telephoneNumber",
-                    "mobile": "mobile",
-                    "email": "mail",
-                    "surname": "sn",
-                    "givenname": "givenName"}
-
-    ldap_search = {}
-    ldap_search['LDAPFILTER'] = "(&(uid=%s)(objectClass=inetOrgPerson))"
-    ldap_search['LDAPSEARCHFILTER'] = "(uid=*)(objectClass=inetOrgPerson)"
-    ldap_search['LOGINNAMEATTRIBUTE'] = "uid"
-
-    ad_search = {}
-    ad_search['LDAPFILTER'] = "(&(sAMAccountName=%s)(objectClass=user))"
-    ad_search['LDAPSEARCHFILTER'] = "(&(sAMAccountName=*)(objectClass=user))"
-    ad_search['LOGINNAMEATTRIBUTE'] = "sAMAccountName"
+# static parts of the command line test configuration
 
-    # final config
-    params = {}
-    params['NOREFERRALS'] = "True"
-    params['EnforceTLS'] = "False"
-    params['SIZELIMIT'] = "500"
-    params['TIMEOUT'] = "5"
-    params['USERINFO'] = json.dumps(user_mapping)
+_USER_MAPPING = {"username": "uid",
+                 "phone": "telephoneNumber",
+                 "mobile": "mobile",
+                 "email": "mail",
+                 "surname": "sn",
+                 "givenname": "givenName"}
+
+_LDAP_SEARCH = {
+    'LDAPFILTER': "(&(uid=%s)(objectClass=inetOrgPerson))",
+    'LDAPSEARCHFILTER': "(uid=*)(objectClass=inetOrgPerson)",
+    'LOGINNAMEATTRIBUTE': "uid",
+    }
+
+_AD_SEARCH = {
+    'LDAPFILTER': "(&(sAMAccountName=%s)(objectClass=user))",
+    'LDAPSEARCHFILTER': "(&(sAMAccountName=*)(objectClass=user))",
+    'LOGINNAMEATTRIBUTE': "sAMAccountName",
+    }
 
+
+@functools.lru_cache(maxsize=1)
+def _build_parser():
+    """
+    build the argument parser of the command line test once on first use
+
+    :return: the argparse.ArgumentParser
+    """
     import argparse
 
     usage = "Interactive test of LDAP Connection"
@@ -1947,6 +3103,21 @@ def get_params():
                         help='define user login attribute: default is uid',
                         required=False)
 
+    return parser
+
+
+def get_params():
+
+    # final config
+    params = {}
+    params['NOREFERRALS'] = "True"
+    params['EnforceTLS'] = "False"
+    params['SIZELIMIT'] = "500"
+    params['TIMEOUT'] = "5"
+    params['USERINFO'] = json.dumps(_USER_MAPPING)
+
+    parser = _build_parser()
+
     args = vars(parser.parse_args())
 
     # start processing the arguments
@@ -1969,12 +3140,12 @@ def get_params():
 
     params['only_trusted_certs'] = args['only_trusted_certs']
 
-    search = ldap_search
+    search = _LDAP_SEARCH
     if args['ldap_type']:
         if 'ad' == args['ldap_type']:
-            search = ad_search
+            search = _AD_SEARCH
         elif 'ldap' == args['ldap_type']:
-            search = ldap_search
+            search = _LDAP_SEARCH
         else:
             raise Exception('unknown ldap search type!')
     params.update(search)